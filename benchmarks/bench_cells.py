@@ -0,0 +1,170 @@
+"""
+Benchmark every registered qutegds cell.
+
+Each cell is timed and memory-profiled cold (empty cell cache) and warm
+(cache hit), and a few scaling sweeps record how build cost grows with the
+size of the layout. Results are written as JSON, so that runs can be
+compared over time::
+
+    python benchmarks/bench_cells.py --output benchmarks.json
+"""
+
+import argparse
+import datetime
+import importlib.metadata as im
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+
+import gdsfactory as gf
+
+import qutegds
+
+CELL_KWARGS = {
+    "resonator_array": {
+        "resonators_attrs": {"length": [800.0, 900.0, 1000.0, 1100.0]},
+        "labels_y_offset": 100,
+    },
+}
+"""Arguments for the cells without usable defaults."""
+
+SWEEPS = {
+    "resonator_n": (
+        "resonator",
+        "n",
+        [1, 2, 4, 8, 16],
+        lambda n: {"n": n, "length": 400.0 * (n + 1)},
+    ),
+    "resonator_array_size": (
+        "resonator_array",
+        "n_resonators",
+        [1, 4, 16, 32],
+        lambda n: {
+            "resonators_attrs": {"length": [800.0 + 10 * i for i in range(n)]},
+            "labels_y_offset": 100,
+            "central_cpw": partial(qutegds.cpw_with_ports, length=1000.0 * (n + 1)),
+        },
+    ),
+    "stripes_array_widths": (
+        "stripes_array",
+        "n_widths",
+        [1, 4, 16, 64],
+        lambda n: {"widths": [1.0 + i for i in range(n)]},
+    ),
+    "centered_chip_negative_size": (
+        "centered_chip",
+        "size",
+        [5e3, 1e4, 2e4, 4e4],
+        lambda size: {"size": (size, size), "negative": True},
+    ),
+}
+"""Scaling sweeps: cell, swept quantity, values and arguments for each value."""
+
+
+def _peak_memory(factory: Callable, **kwargs) -> int:
+    """Return peak memory (bytes) allocated by a call to factory."""
+    tracemalloc.start()
+    try:
+        factory(**kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(
+    factory: Callable, repeat: int = 3, warm_repeat: int = 100, **kwargs
+) -> dict:
+    """Return cold and warm build time (s) and peak memory (bytes).
+
+    Times are measured without tracing memory allocations, which slows the
+    builds down, and peak memory by separate cold and warm calls.
+
+    Args:
+        factory (Callable): cell factory
+        repeat (int): number of cold builds, the fastest is kept
+        warm_repeat (int): number of warm builds, the fastest and the median are kept
+        kwargs: arguments for the factory
+    """
+    cold = []
+    cold_peak = 0
+    for _ in range(repeat):
+        gf.clear_cache()
+        start = time.perf_counter()
+        factory(**kwargs)
+        cold.append(time.perf_counter() - start)
+        gf.clear_cache()
+        cold_peak = max(cold_peak, _peak_memory(factory, **kwargs))
+    component = factory(**kwargs)
+    warm = []
+    for _ in range(warm_repeat):
+        start = time.perf_counter()
+        factory(**kwargs)
+        warm.append(time.perf_counter() - start)
+    return {
+        "cold_s": min(cold),
+        "warm_s": min(warm),
+        "warm_median_s": statistics.median(warm),
+        "cold_peak_bytes": cold_peak,
+        "warm_peak_bytes": _peak_memory(factory, **kwargs),
+        "polygons": len(component.get_polygons()),
+    }
+
+
+def run(repeat: int = 3) -> dict:
+    """Run every cell benchmark and scaling sweep.
+
+    Args:
+        repeat (int): number of cold builds per measurement
+    """
+    cells = {
+        name: measure(factory, repeat=repeat, **CELL_KWARGS.get(name, {}))
+        for name, factory in sorted(qutegds.cells.items())
+    }
+    sweeps = {}
+    for sweep, (name, quantity, values, kwargs) in SWEEPS.items():
+        factory = qutegds.cells[name]
+        sweeps[sweep] = {
+            "cell": name,
+            "quantity": quantity,
+            "points": [
+                {quantity: value, **measure(factory, repeat=repeat, **kwargs(value))}
+                for value in values
+            ],
+        }
+    return {
+        "metadata": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "qutegds": qutegds.__version__,
+            "gdsfactory": im.version("gdsfactory"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "cells": cells,
+        "sweeps": sweeps,
+    }
+
+
+def main():
+    """Run the benchmarks and write the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default="benchmarks.json", help="JSON file")
+    parser.add_argument("--repeat", type=int, default=3, help="cold builds per cell")
+    args = parser.parse_args()
+    results = run(repeat=args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    for name, result in results["cells"].items():
+        print(
+            f"{name:25s} cold {result['cold_s']:8.4f}s "
+            f"{result['cold_peak_bytes'] / 2**20:7.1f} MiB  "
+            f"warm {result['warm_s']:.2e}s {result['warm_peak_bytes'] / 2**10:6.1f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
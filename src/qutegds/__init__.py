@@ -1,43 +1,56 @@
-"""qutegds module."""
+"""qutegds module.
 
+Component factories and the qute PDK are resolved lazily on first access, so
+that ``import qutegds`` does not pay the gdsfactory import and PDK setup cost.
+"""
+
+import importlib
 import importlib.metadata as im
-import sys
 
 __version__ = im.version(__package__)
 
-import gdsfactory as gf
-from gdsfactory.generic_tech import get_generic_pdk
-from gdsfactory.get_factories import get_cells
-
-from qutegds.components.chip_layout import (
-    centered_chip,
-    chip_title,
-    squares_at_corner_chip,
-)
-from qutegds.components.cpw_base import (
-    cpw,
-    cpw_with_ports,
-    rf_port,
-    snake,
-    straight_taper,
-)
-from qutegds.components.resonator import (
-    resonator,
-    resonator_array,
-    resonator_cpw,
-    termination_closed,
-    termination_open,
-)
-from qutegds.components.simple_strip import strip_with_pads, stripes_array
-
-generic_pdk = get_generic_pdk()
-cells = get_cells(sys.modules[__name__])
-qute_pdk = gf.Pdk(
-    name="qute",
-    cells=cells,
-    base_pdk=generic_pdk,
-    layers=generic_pdk.layers,
-    layer_views=generic_pdk.layer_views,
-    cross_sections=generic_pdk.cross_sections,
-)
-qute_pdk.activate()
+_LAZY_ATTRS = {
+    "centered_chip": "qutegds.components.chip_layout",
+    "chip_title": "qutegds.components.chip_layout",
+    "squares_at_corner_chip": "qutegds.components.chip_layout",
+    "cpw": "qutegds.components.cpw_base",
+    "cpw_with_ports": "qutegds.components.cpw_base",
+    "rf_port": "qutegds.components.cpw_base",
+    "snake": "qutegds.components.cpw_base",
+    "straight_taper": "qutegds.components.cpw_base",
+    "flux_holes": "qutegds.components.ground_plane",
+    "glyph": "qutegds.components.labels",
+    "label": "qutegds.components.labels",
+    "resonator": "qutegds.components.resonator",
+    "resonator_array": "qutegds.components.resonator",
+    "resonator_cpw": "qutegds.components.resonator",
+    "termination_closed": "qutegds.components.resonator",
+    "termination_open": "qutegds.components.resonator",
+    "strip_with_pads": "qutegds.components.simple_strip",
+    "stripes_array": "qutegds.components.simple_strip",
+    "wafer": "qutegds.components.wafer",
+    "cells": "qutegds.pdk",
+    "generic_pdk": "qutegds.pdk",
+    "qute_pdk": "qutegds.pdk",
+}
+
+__all__ = ["__version__", "get_qute_pdk", *_LAZY_ATTRS]
+
+
+def get_qute_pdk():
+    """Return the qute PDK, building and activating it on first call."""
+    return importlib.import_module("qutegds.pdk").qute_pdk
+
+
+def __getattr__(name: str):
+    """Import component factories and PDK objects on first access (PEP 562)."""
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List lazy attributes alongside the eagerly defined ones."""
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,177 @@
+"""
+Build GDS files for parameter sweeps over the registered cells.
+
+A sweep spec lists cells, fixed settings and swept settings, every
+combination of the swept values being a variant::
+
+    output: build
+    cells:
+      - cell: resonator_cpw
+        settings: {width: 10}
+        sweep:
+          length: [3000, 4000, 5000]
+          gap: [5, 6]
+      - cell: stripes_array
+        sweep:
+          widths: [[1, 2], [5, 10]]
+
+Each variant is written to ``<cell>_<hash>.gds`` and recorded in a
+``manifest.json``, so that variants whose hash did not change since the last
+build are skipped. The hash covers the canonicalized settings and the qutegds
+version. Variants no longer in the spec are removed from the output.
+
+.. module:: build.py
+"""
+
+import itertools
+import json
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import yaml
+
+import qutegds
+
+MANIFEST = "manifest.json"
+
+
+class Variant(NamedTuple):
+    """Cell and settings of a single layout to build."""
+
+    cell: str
+    """Name of the registered cell."""
+    settings: dict
+    """Keyword arguments of the cell."""
+    key: str
+    """Hash of the cell, its canonicalized settings and the qutegds version."""
+
+    @property
+    def filename(self) -> str:
+        """Name of the GDS file of the variant."""
+        return f"{self.cell}_{self.key[:12]}.gds"
+
+
+def load_spec(path: str | pathlib.Path) -> dict:
+    """Return sweep spec read from a YAML file."""
+    spec = yaml.safe_load(pathlib.Path(path).read_text(encoding="utf-8")) or {}
+    if not isinstance(spec, dict):
+        raise ValueError(f"{path}: the sweep spec needs to be a mapping")
+    if not isinstance(spec.get("cells"), list):
+        raise ValueError(f"{path}: the sweep spec needs a list of cells")
+    return spec
+
+
+def variants(spec: dict) -> list[Variant]:
+    """Return every variant of a sweep spec.
+
+    Args:
+        spec (dict): sweep spec, with a list of cells made of a cell name,
+            fixed settings and lists of swept values
+    """
+    # pylint: disable=import-outside-toplevel
+    from qutegds.cache import canonical_kwargs, cell_key
+    from qutegds.pdk import cells
+
+    result = []
+    for entry in spec["cells"]:
+        name = entry["cell"]
+        if name not in cells:
+            raise ValueError(f"{name!r} is not a registered cell")
+        sweep = entry.get("sweep") or {}
+        for values in itertools.product(*sweep.values()):
+            settings = entry.get("settings", {}) | dict(zip(sweep, values))
+            key = cell_key(name, canonical_kwargs(cells[name], **settings))
+            result.append(Variant(name, settings, key))
+    return result
+
+
+def _build_variant(cell: str, settings: dict, gdspath: str) -> str:
+    """Build a variant and write it to gdspath, in a worker process."""
+    # pylint: disable=import-outside-toplevel
+    from qutegds.pdk import cells
+
+    component = cells[cell](**settings)
+    component.write_gds(gdspath, logging=False)
+    return gdspath
+
+
+def build(
+    spec: dict,
+    output: Optional[str | pathlib.Path] = None,
+    max_workers: Optional[int] = None,
+    force: bool = False,
+) -> dict[str, list[str]]:
+    """Build the variants of a sweep spec, skipping the unchanged ones.
+
+    Args:
+        spec (dict): sweep spec, see ``variants``
+        output (Optional[str | pathlib.Path]): output directory, defaults to the
+            spec ``output`` entry or "build"
+        max_workers (Optional[int]): processes building the variants, defaults to the CPU count
+        force (bool): rebuild every variant
+
+    Returns:
+        file names of the "built", "skipped" and "removed" variants
+    """
+    output = pathlib.Path(output or spec.get("output", "build"))
+    output.mkdir(parents=True, exist_ok=True)
+    manifest_path = output / MANIFEST
+    manifest = (
+        json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest_path.exists()
+        else {}
+    )
+
+    todo, skipped = {}, []
+    current = {variant.filename: variant for variant in variants(spec)}
+    removed = sorted(set(manifest) - set(current))
+    for filename in removed:
+        (output / filename).unlink(missing_ok=True)
+        del manifest[filename]
+    if removed:
+        _write_manifest(manifest_path, manifest)
+
+    for variant in current.values():
+        entry = manifest.get(variant.filename)
+        if (
+            not force
+            and entry is not None
+            and entry["key"] == variant.key
+            and (output / variant.filename).exists()
+        ):
+            skipped.append(variant.filename)
+        else:
+            todo[variant.filename] = variant
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                filename: pool.submit(
+                    _build_variant,
+                    variant.cell,
+                    variant.settings,
+                    str(output / filename),
+                )
+                for filename, variant in todo.items()
+            }
+            for filename, future in futures.items():
+                future.result()
+                variant = todo[filename]
+                manifest[filename] = {
+                    "cell": variant.cell,
+                    "settings": variant.settings,
+                    "key": variant.key,
+                    "version": qutegds.__version__,
+                }
+                _write_manifest(manifest_path, manifest)
+    return {"built": list(todo), "skipped": skipped, "removed": removed}
+
+
+def _write_manifest(path: pathlib.Path, manifest: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps(manifest, indent=2, sort_keys=True, default=str), encoding="utf-8"
+    )
+    os.replace(tmp, path)
@@ -0,0 +1,569 @@
+"""
+Persistent on-disk cache of qutegds cells and bounds of the in-memory cache.
+
+Cells are stored as GDS (or OASIS) bytes plus a JSON file holding their
+``info``, settings and ports, under a key hashing the cell name, its
+canonicalized keyword arguments and the qutegds version. The gdsfactory cell
+cache held in memory can be bounded too, by number of cells or by bytes.
+
+.. module:: cache.py
+"""
+
+import functools
+import gc
+import hashlib
+import inspect
+import json
+import math
+import os
+import pathlib
+import tempfile
+import weakref
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Optional
+
+import gdstk
+import numpy as np
+from gdsfactory import Component, ComponentReference
+from gdsfactory.cell import CACHE, CACHE_IDS
+from gdsfactory.component import name_counters
+from gdsfactory.component_layout import CellSettings, Info
+from gdsfactory.serialization import clean_value_json
+
+import qutegds
+from qutegds.geometry import DBU
+
+FORMATS = ("gds", "oas")
+_DIGITS = round(-math.log10(DBU)) + 3
+
+
+def canonical_kwargs(func: Callable, *args, **kwargs) -> dict:
+    """Return JSON serializable canonical arguments of a call, including defaults.
+
+    Args:
+        func (Callable): cell factory, possibly decorated
+        args: positional arguments of the call
+        kwargs: keyword arguments of the call
+    """
+    sig = inspect.signature(func)
+    bound = sig.bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    for name, param in sig.parameters.items():
+        if param.kind == param.VAR_KEYWORD:
+            arguments.update(arguments.pop(name, {}))
+    return {key: canonical(value) for key, value in arguments.items()}
+
+
+def canonical(value) -> Hashable:
+    """Return compact hashable form of a cell argument, stable across processes.
+
+    Nested partials are flattened into their function and arguments, floats
+    are rounded to a thousandth of the database unit, so that only float
+    noise is ignored, dicts are sorted by key, sequences and
+    arrays become tuples, components are replaced by their name and functions
+    by their qualified name.
+
+    Args:
+        value: argument of a cell factory
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        # adding 0.0 turns -0.0 into 0.0
+        return round(float(value), _DIGITS) + 0.0
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return canonical(value.tolist())
+    if isinstance(value, dict):
+        return ("dict",) + tuple(
+            sorted((str(key), canonical(item)) for key, item in value.items())
+        )
+    if isinstance(value, (set, frozenset)):
+        return ("set",) + tuple(sorted((canonical(item) for item in value), key=repr))
+    if isinstance(value, Component):
+        return ("component", value.name)
+    if isinstance(value, functools.partial):
+        func, args, keywords = value.func, value.args, dict(value.keywords)
+        while isinstance(func, functools.partial):
+            args = func.args + args
+            keywords = func.keywords | keywords
+            func = func.func
+        return ("partial", canonical(func), canonical(args), canonical(keywords))
+    if callable(value):
+        name = f"{value.__module__}.{getattr(value, '__qualname__', type(value))}"
+        # lambdas and local functions are told apart by identity, within a process
+        return ("function", name, id(value)) if "<" in name else ("function", name)
+    serialized = clean_value_json(value)
+    if serialized is value:
+        return repr(value)
+    return canonical(serialized)
+
+
+def canonical_key(sig: inspect.Signature, *args, **kwargs) -> tuple:
+    """Return canonical arguments of a call, including defaults, sorted by name.
+
+    Args:
+        sig (inspect.Signature): signature of the cell factory
+        args: positional arguments of the call
+        kwargs: keyword arguments of the call
+    """
+    bound = sig.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    for name, param in sig.parameters.items():
+        if param.kind == param.VAR_KEYWORD:
+            arguments.update(arguments.pop(name, {}))
+    return tuple(sorted((name, canonical(value)) for name, value in arguments.items()))
+
+
+def cell_key(name: str, kwargs: dict) -> str:
+    """Return hash identifying a cell across processes and sessions.
+
+    Args:
+        name (str): name of the cell factory
+        kwargs (dict): canonicalized keyword arguments
+    """
+    payload = json.dumps(
+        {"cell": name, "kwargs": kwargs, "version": qutegds.__version__},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _metadata(component: Component) -> dict:
+    metadata = component.to_dict()
+    metadata["ports"] = {name: port.to_dict() for name, port in component.ports.items()}
+    return metadata
+
+
+def _set_metadata(component: Component, metadata: dict) -> None:
+    component.info = Info(**metadata.get("info", {}))
+    component.settings = CellSettings(**metadata.get("settings", {}))
+    component.function_name = metadata.get("function")
+    component.module = metadata.get("module")
+    for name, port in metadata.get("ports", {}).items():
+        component.add_port(
+            name=name,
+            center=np.array(port["center"], dtype="float64"),
+            width=port["width"],
+            orientation=port["orientation"],
+            layer=tuple(port["layer"]),
+            port_type=port["port_type"],
+        )
+
+
+def serialize_component(component: Component, fmt: str = "gds") -> tuple[bytes, dict]:
+    """Return layout bytes and metadata (info, settings, ports) of a component.
+
+    Args:
+        component (Component): component to serialize
+        fmt (str): layout format, either "gds" or "oas"
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt={fmt!r} must be one of {FORMATS}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / f"{component.name}.{fmt}"
+        write = component.write_oas if fmt == "oas" else component.write_gds
+        write(path, logging=False)
+        data = path.read_bytes()
+    metadata = _metadata(component)
+    # children are cached under their names too, so they need their ports
+    metadata["cells"] = {
+        child.name: _metadata(child)
+        for child in component.get_dependencies(recursive=True)
+    }
+    return data, clean_value_json(metadata)
+
+
+def deserialize_component(data: bytes, metadata: dict, fmt: str = "gds") -> Component:
+    """Return component from layout bytes and metadata.
+
+    Cells whose name is already in the gdsfactory cache are reused instead of
+    duplicated, so that loaded cells can be mixed with freshly built ones.
+    The other cells are added to the cache with their own info and ports.
+
+    Args:
+        data (bytes): layout bytes
+        metadata (dict): metadata returned by ``serialize_component``
+        fmt (str): layout format, either "gds" or "oas"
+    """
+    if metadata["name"] in CACHE:
+        return CACHE[metadata["name"]]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / f"cell.{fmt}"
+        path.write_bytes(data)
+        library = (
+            gdstk.read_oas(str(path)) if fmt == "oas" else gdstk.read_gds(str(path))
+        )
+
+    loaded = {}
+    components = {}
+    for gds_cell in library.cells:
+        if gds_cell.name in CACHE:
+            components[gds_cell.name] = CACHE[gds_cell.name]
+            continue
+        comp = Component()
+        comp.rename(gds_cell.name)
+        comp._cell = gds_cell  # pylint: disable=protected-access
+        components[gds_cell.name] = loaded[gds_cell.name] = comp
+
+    for name, comp in loaded.items():
+        for ref in comp._cell.references:  # pylint: disable=protected-access
+            component_ref = ComponentReference(
+                component=components[ref.cell.name],
+                origin=ref.origin,
+                rotation=ref.rotation,
+                magnification=ref.magnification,
+                x_reflection=ref.x_reflection,
+                columns=ref.repetition.columns or 1,
+                rows=ref.repetition.rows or 1,
+                spacing=ref.repetition.spacing,
+                v1=ref.repetition.v1,
+                v2=ref.repetition.v2,
+            )
+            # pylint: disable=protected-access
+            component_ref._reference = ref
+            comp._register_reference(component_ref)
+            comp._references.append(component_ref)
+
+    cells = metadata["cells"] | {metadata["name"]: metadata}
+    for name, comp in loaded.items():
+        _set_metadata(comp, cells[name])
+    for comp in loaded.values():
+        comp._locked = True  # pylint: disable=protected-access
+        CACHE_IDS.add(id(comp))
+    return components[metadata["name"]]
+
+
+class DiskCache:
+    """Content-addressed cell cache with a size cap and LRU eviction.
+
+    Entries are written to temporary files and atomically moved in place, so
+    that concurrent processes can share the same directory. Reading an entry
+    refreshes its modification time, which is used as LRU order on eviction.
+
+    Args:
+        dirpath (str | pathlib.Path): cache directory, created if missing
+        max_size (int): maximum total size in bytes of the cached entries
+        fmt (str): layout format, either "gds" or "oas"
+    """
+
+    def __init__(
+        self, dirpath: str | pathlib.Path, max_size: int = 2**30, fmt: str = "gds"
+    ):
+        """Open the cache in dirpath, keeping the entries already there."""
+        if fmt not in FORMATS:
+            raise ValueError(f"fmt={fmt!r} must be one of {FORMATS}")
+        self.dirpath = pathlib.Path(dirpath)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.fmt = fmt
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> tuple[pathlib.Path, pathlib.Path]:
+        return self.dirpath / f"{key}.{self.fmt}", self.dirpath / f"{key}.json"
+
+    def _write_atomic(self, path: pathlib.Path, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.dirpath, prefix=".tmp-", suffix=path.suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def get(self, key: str) -> Component | None:
+        """Return cached component, or None if the key is missing.
+
+        A cell already in the gdsfactory cache is returned as is, without
+        touching the entry nor counting a hit.
+        """
+        layout_path, metadata_path = self._paths(key)
+        try:
+            metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+            if "cells" not in metadata:
+                # written before children metadata was stored
+                raise FileNotFoundError(metadata_path)
+            if metadata["name"] in CACHE:
+                return CACHE[metadata["name"]]
+            data = layout_path.read_bytes()
+            os.utime(metadata_path)
+            os.utime(layout_path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return deserialize_component(data, metadata, fmt=self.fmt)
+
+    def put(self, key: str, component: Component) -> None:
+        """Store component under key, evicting old entries beyond max_size."""
+        data, metadata = serialize_component(component, fmt=self.fmt)
+        layout_path, metadata_path = self._paths(key)
+        # metadata is written last: an entry without it is never read
+        self._write_atomic(layout_path, data)
+        self._write_atomic(metadata_path, json.dumps(metadata).encode())
+        self.evict()
+
+    def size(self) -> int:
+        """Return total size in bytes of the cached entries."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [
+            entry
+            for entry in os.scandir(self.dirpath)
+            if entry.is_file() and not entry.name.startswith(".tmp-")
+        ]
+
+    def evict(self) -> None:
+        """Remove least recently used entries until size is below max_size."""
+        entries: dict[str, tuple[int, float]] = {}
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            key = entry.name.split(".")[0]
+            size, mtime = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+        total = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size:
+                break
+            for path in self._paths(key):
+                path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        for entry in self._entries():
+            pathlib.Path(entry.path).unlink(missing_ok=True)
+
+    def key(self, factory: Callable, *args, **kwargs) -> str:
+        """Return key of a call to a cell factory.
+
+        Args:
+            factory (Callable): cell factory
+            args: positional arguments for the factory
+            kwargs: keyword arguments for the factory
+        """
+        func = factory.func if isinstance(factory, functools.partial) else factory
+        return cell_key(func.__name__, canonical_kwargs(factory, *args, **kwargs))
+
+    def build(self, factory: Callable, *args, **kwargs) -> Component:
+        """Return component from the cache, building and storing it on a miss.
+
+        Args:
+            factory (Callable): cell factory
+            args: positional arguments for the factory
+            kwargs: keyword arguments for the factory
+        """
+        key = self.key(factory, *args, **kwargs)
+        component = self.get(key)
+        if component is None:
+            component = factory(*args, **kwargs)
+            self.put(key, component)
+        return component
+
+
+_disk_cache: DiskCache | None = None
+
+
+def enable_disk_cache(
+    dirpath: str | pathlib.Path, max_size: int = 2**30, fmt: str = "gds"
+) -> DiskCache:
+    """Make every qutegds cell look up the disk cache before being built.
+
+    Args:
+        dirpath (str | pathlib.Path): cache directory, created if missing
+        max_size (int): maximum total size in bytes of the cached entries
+        fmt (str): layout format, either "gds" or "oas"
+    """
+    global _disk_cache  # pylint: disable=global-statement
+    _disk_cache = DiskCache(dirpath, max_size=max_size, fmt=fmt)
+    return _disk_cache
+
+
+def disable_disk_cache() -> None:
+    """Stop looking up the disk cache when building qutegds cells."""
+    global _disk_cache  # pylint: disable=global-statement
+    _disk_cache = None
+
+
+def get_disk_cache() -> DiskCache | None:
+    """Return the active disk cache, if any."""
+    return _disk_cache
+
+
+def drop_cell(name: str) -> None:
+    """Remove a cell from the gdsfactory cache, if present.
+
+    The name counter is reset too, so that a rebuilt cell gets its name
+    back instead of a "$1" suffix.
+
+    Args:
+        name (str): name of the cell
+    """
+    component = CACHE.pop(name, None)
+    if component is not None:
+        CACHE_IDS.discard(id(component))
+    name_counters.pop(name, None)
+
+
+def _nbytes(component: Component) -> int:
+    """Return rough memory footprint of the polygons and references of a cell."""
+    gds_cell = component._cell  # pylint: disable=protected-access
+    return 16 * sum(polygon.size for polygon in gds_cell.polygons) + 128 * len(
+        gds_cell.references
+    )
+
+
+class MemoryCache:
+    """LRU bound of the gdsfactory cell cache, by number of cells or bytes.
+
+    Every qutegds cell returned to the caller is recorded as used, and the
+    other cells added to the gdsfactory cache while building it, such as
+    intermediate booleans, are tracked too. Beyond the bounds, the least
+    recently used cells are dropped from the gdsfactory cache, but only once
+    no live parent references them anymore, be it cached or still held by the
+    caller, so that no live cell points to a dropped one. Parents dropped
+    from the cache are often only freed by the garbage collector, which is
+    run when the bounds cannot be met otherwise. A dropped cell is rebuilt
+    when requested again.
+
+    Args:
+        max_entries (Optional[int]): maximum number of cached cells
+        max_bytes (Optional[int]): maximum estimated size in bytes of the cached cells
+    """
+
+    def __init__(
+        self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None
+    ):
+        """Start tracking the gdsfactory cache, without any cell yet."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._order: OrderedDict[str, int] = OrderedDict()
+        self._parents: defaultdict[str, weakref.WeakSet[Component]] = defaultdict(
+            weakref.WeakSet
+        )
+
+    def __len__(self) -> int:
+        """Return number of tracked cells."""
+        return len(self._order)
+
+    def _add(self, component: Component) -> None:
+        """Track a cell, replacing any dropped cell of the same name."""
+        if component.name in self._order:
+            self.nbytes -= self._order.pop(component.name)
+        for ref in component.references:
+            self._parents[ref.parent.name].add(component)
+        self._order[component.name] = nbytes = _nbytes(component)
+        self.nbytes += nbytes
+
+    def use(self, component: Component, added: Iterable[Component] = ()) -> list[str]:
+        """Record a use of a cell and return the names of the evicted cells.
+
+        Args:
+            component (Component): cell returned to the caller
+            added (Iterable[Component]): cells added to the gdsfactory cache
+                while building it, in order
+        """
+        if component.name in self._order:
+            self.hits += 1
+        else:
+            self.misses += 1
+        for item in added:
+            self._add(item)
+        if component.name in self._order:
+            self._order.move_to_end(component.name)
+        else:
+            self._add(component)
+        return self.evict(keep=component.name)
+
+    def _over(self) -> bool:
+        return (
+            self.max_entries is not None and len(self._order) > self.max_entries
+        ) or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+
+    def _forget(self, name: str) -> None:
+        self.nbytes -= self._order.pop(name)
+        if not self._parents.get(name):
+            self._parents.pop(name, None)
+
+    def _released_parents(self) -> bool:
+        """Return whether some cell is only kept by parents out of the cache."""
+        return any(
+            parents and all(CACHE.get(parent.name) is not parent for parent in parents)
+            for parents in map(self._parents.get, self._order)
+        )
+
+    def evict(self, keep: Optional[str] = None) -> list[str]:
+        """Drop least recently used cells without live parents while over the bounds.
+
+        Args:
+            keep (Optional[str]): name of a cell never to drop
+        """
+        evicted: list[str] = []
+        progress, collected = True, False
+        while self._over():
+            if not progress:
+                if collected or not self._released_parents():
+                    break
+                # dropped parents are often only held by reference cycles
+                gc.collect()
+                collected = True
+            progress = False
+            for name in list(self._order):
+                if not self._over():
+                    break
+                if name not in CACHE:
+                    # dropped by gf.clear_cache or by a streaming export
+                    self._forget(name)
+                    progress = True
+                elif name != keep and not self._parents.get(name):
+                    drop_cell(name)
+                    self._forget(name)
+                    self.evictions += 1
+                    evicted.append(name)
+                    progress = True
+        return evicted
+
+
+_memory_cache: MemoryCache | None = None
+
+
+def enable_memory_cache(
+    max_entries: Optional[int] = None, max_bytes: Optional[int] = None
+) -> MemoryCache:
+    """Bound the in-memory cache of the cells built through qutegds cells.
+
+    Args:
+        max_entries (Optional[int]): maximum number of cached cells
+        max_bytes (Optional[int]): maximum estimated size in bytes of the cached cells
+    """
+    global _memory_cache  # pylint: disable=global-statement
+    _memory_cache = MemoryCache(max_entries=max_entries, max_bytes=max_bytes)
+    return _memory_cache
+
+
+def disable_memory_cache() -> None:
+    """Stop bounding the in-memory cell cache."""
+    global _memory_cache  # pylint: disable=global-statement
+    _memory_cache = None
+
+
+def get_memory_cache() -> MemoryCache | None:
+    """Return the active in-memory cache bounds, if any."""
+    return _memory_cache
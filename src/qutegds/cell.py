@@ -0,0 +1,189 @@
+"""
+Cell decorator shared by every qutegds component factory.
+
+.. module:: cell.py
+"""
+
+import functools
+import hashlib
+import importlib
+import inspect
+import itertools
+import sys
+import warnings
+from collections.abc import Callable
+
+import gdsfactory as gf
+from gdsfactory import Component
+from gdsfactory.cell import CACHE
+from gdsfactory.config import CONF
+from gdsfactory.name import clean_name, get_name_short
+from gdsfactory.serialization import clean_value_name
+
+from qutegds import cache, geometry, tracing
+
+MAX_ARGS_LENGTH = 28
+"""Longest arguments string kept in cell names, as gdsfactory, longer ones are hashed."""
+
+_names: dict[tuple, str] = {}
+"""Cell names by factory name and canonical arguments."""
+_keys: dict[str, tuple] = {}
+_depth = 0
+
+
+def activate_pdk() -> None:
+    """Activate the qute PDK, unless it was already imported.
+
+    Cells refer to each other by name, e.g. ``cpw("resonator")``, so the PDK
+    is needed by the first build, but not to import the component modules.
+    """
+    if "qutegds.pdk" not in sys.modules:
+        importlib.import_module("qutegds.pdk")
+
+
+def cell_name(prefix: str, key: tuple, defaults: dict) -> str:
+    """Return cell name from the canonical arguments differing from the defaults.
+
+    Names only depend on the canonical arguments, so that they are the same
+    in every process. Short scalar arguments are spelled out as gdsfactory
+    does, others are replaced by their md5 hash, as in gdsfactory, though
+    computed from the canonical arguments.
+
+    Args:
+        prefix (str): name of the cell factory
+        key (tuple): canonical arguments returned by ``cache.canonical_key``
+        defaults (dict): canonical default arguments
+    """
+    changed = [(name, value) for name, value in key if defaults.get(name, key) != value]
+    if not changed:
+        return prefix
+    args = "_".join(
+        sorted(f"{name}={clean_value_name(value)}" for name, value in changed)
+    )
+    if len(args) > MAX_ARGS_LENGTH or not all(_spelled(value) for _, value in changed):
+        args = hashlib.md5(repr(changed).encode()).hexdigest()[:8]
+    return get_name_short(
+        clean_name(f"{prefix}_{args}"), max_name_length=CONF.max_name_length
+    )
+
+
+def _spelled(value) -> bool:
+    """Return whether value is spelled out in cell names without losing digits."""
+    if isinstance(value, float):
+        return clean_value_name(value) == str(value)
+    return isinstance(value, (type(None), bool, int, str))
+
+
+def forget(name: str) -> None:
+    """Drop a cell from the caches, it is rebuilt under the same name if needed.
+
+    Args:
+        name (str): name of the cell
+    """
+    cache.drop_cell(name)
+    key = _keys.pop(name, None)
+    if key is not None:
+        _names.pop(key, None)
+
+
+def _prune_names() -> None:
+    """Drop the names of the cells no longer cached, e.g. after ``gf.clear_cache``."""
+    for name in [name for name in _keys if name not in CACHE]:
+        _names.pop(_keys.pop(name), None)
+
+
+def cell(func: Callable[..., Component]) -> Callable[..., Component]:
+    """Decorate func with ``gf.cell``, looking up the disk cache when enabled.
+
+    Calls are looked up by their canonical arguments (see
+    ``cache.canonical``) before any gdsfactory serialization, and cells are
+    named after them. Builds are recorded by the active tracer, if any, and
+    the in-memory cache is kept within the bounds set by
+    ``cache.enable_memory_cache``. Cells built while booleans are deferred get
+    a "_deferred" suffix, so that they never clash with the cells holding the
+    resolved booleans. The first build activates the qute PDK.
+
+    Args:
+        func (Callable): function returning a Component
+    """
+
+    @functools.wraps(func)
+    def deferred(*args, **kwargs) -> Component:
+        return func(*args, **kwargs)
+
+    deferred.__name__ = deferred.__qualname__ = f"{func.__name__}_deferred"
+    gf_cells = {False: gf.cell(func), True: gf.cell(deferred)}
+    sig = inspect.signature(func)
+    defaults = {
+        name: cache.canonical(param.default)
+        for name, param in sig.parameters.items()
+        if param.default is not param.empty
+    }
+
+    def build(*args, **kwargs) -> tuple[Component, bool]:
+        """Return cell and whether it was found in the memory or disk cache."""
+        gf_cell = gf_cells[geometry.booleans_deferred()]
+        key = (gf_cell.__name__, cache.canonical_key(sig, *args, **kwargs))
+        name = _names.get(key)
+        if name in CACHE:
+            return CACHE[name], True
+        if name is None:
+            name = _names[key] = cell_name(gf_cell.__name__, key[1], defaults)
+            _keys[name] = key
+            # e.g. loaded as the child of a disk cache entry
+            if name in CACHE:
+                return CACHE[name], True
+
+        @functools.wraps(gf_cell)
+        def named(*args, **kwargs) -> Component:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", "name is deprecated")
+                return gf_cell(*args, name=name, **kwargs)
+
+        disk_cache = cache.get_disk_cache()
+        if disk_cache is None:
+            return named(*args, **kwargs), False
+        disk_key = disk_cache.key(named, *args, **kwargs)
+        component = disk_cache.get(disk_key)
+        if component is not None:
+            return component, True
+        component = named(*args, **kwargs)
+        disk_cache.put(disk_key, component)
+        return component, False
+
+    def traced(*args, **kwargs) -> Component:
+        tracer = tracing.get_tracer()
+        if tracer is None:
+            return build(*args, **kwargs)[0]
+        with tracer.span(func.__name__) as span:
+            component, span["cache_hit"] = build(*args, **kwargs)
+            if not span["cache_hit"]:
+                span["polygons"] = len(component.polygons)
+                span["vertices"] = sum(len(p.points) for p in component.polygons)
+        return component
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Component:
+        global _depth  # pylint: disable=global-statement
+        activate_pdk()
+        if not _depth and len(_keys) > len(CACHE):
+            _prune_names()
+        before = len(CACHE)
+        _depth += 1
+        try:
+            component = traced(*args, **kwargs)
+        finally:
+            _depth -= 1
+        memory_cache = cache.get_memory_cache()
+        # cells are only evicted once the outermost cell is built, so that
+        # no cell is dropped while a parent under construction uses it
+        if memory_cache is not None and not _depth:
+            # the gdsfactory cache is a dict, so the new cells come last
+            added = itertools.islice(
+                reversed(CACHE.values()), max(len(CACHE) - before, 0)
+            )
+            for name in memory_cache.use(component, reversed(list(added))):
+                forget(name)
+        return component
+
+    return wrapper
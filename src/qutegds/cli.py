@@ -0,0 +1,103 @@
+"""
+Command line interface, installed as the ``qutegds`` console script.
+
+Sweeps are built with ``build`` and cells are served with ``serve``::
+
+    qutegds build sweep.yml --jobs 8
+    qutegds serve --port 8765 --jobs 4
+
+.. module:: cli.py
+"""
+
+import argparse
+from typing import Optional
+
+
+def _build(args: argparse.Namespace) -> None:
+    # pylint: disable=import-outside-toplevel
+    from qutegds.build import build, load_spec
+
+    result = build(
+        load_spec(args.spec),
+        output=args.output,
+        max_workers=args.jobs,
+        force=args.force,
+    )
+    for filename in result["built"]:
+        print(f"built   {filename}")
+    for filename in result["skipped"]:
+        print(f"skipped {filename}")
+    for filename in result["removed"]:
+        print(f"removed {filename}")
+    print(
+        f"{len(result['built'])} built, {len(result['skipped'])} up to date, "
+        f"{len(result['removed'])} removed"
+    )
+
+
+def _serve(args: argparse.Namespace) -> None:
+    # pylint: disable=import-outside-toplevel
+    import asyncio
+
+    from qutegds.server import serve
+
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"serving qutegds cells on {where}")
+    try:
+        asyncio.run(
+            serve(
+                host=args.host,
+                port=args.port,
+                unix=args.unix,
+                max_workers=args.jobs,
+                cache_dir=args.cache_dir,
+                max_entries=args.max_entries,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the qutegds command line interface."""
+    parser = argparse.ArgumentParser(prog="qutegds", description=__doc__.split("\n")[1])
+    subparsers = parser.add_subparsers(required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="build one GDS per variant of a YAML sweep spec"
+    )
+    build_parser.add_argument("spec", help="YAML sweep spec")
+    build_parser.add_argument(
+        "-o", "--output", help="output directory, overrides the spec output entry"
+    )
+    build_parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes, defaults to the CPU count"
+    )
+    build_parser.add_argument(
+        "--force", action="store_true", help="rebuild unchanged variants too"
+    )
+    build_parser.set_defaults(func=_build)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="serve cell builds over HTTP from warm worker processes"
+    )
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1", help="address to listen on"
+    )
+    serve_parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    serve_parser.add_argument("--unix", help="Unix socket to listen on instead of TCP")
+    serve_parser.add_argument(
+        "-j", "--jobs", type=int, help="worker processes, defaults to the CPU count"
+    )
+    serve_parser.add_argument("--cache-dir", help="disk cache shared by the workers")
+    serve_parser.add_argument(
+        "--max-entries", type=int, help="bound of the cell cache of each worker"
+    )
+    serve_parser.set_defaults(func=_serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
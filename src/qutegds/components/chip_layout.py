@@ -4,20 +4,27 @@ Components to mark or draw the chip boundaries.
 .. module:: chip_layout.py
 """
 
+from typing import Optional
+
 import gdsfactory as gf
+import numpy as np
 from gdsfactory import Component
 from gdsfactory.typings import ComponentSpec, LayerSpec
 
+from qutegds.cell import cell
+from qutegds.components.labels import label
 from qutegds.components.simple_strip import stripes_array
-from qutegds.geometry import subtract
+from qutegds.geometry import subtract, subtract_tiled
 
 
-@gf.cell
+@cell
 def centered_chip(
     center_comp: ComponentSpec = stripes_array,
     size: tuple = (2e4, 2e4),
     layer: LayerSpec = (2, 0),
     negative: bool = False,
+    tile_size: Optional[float] = None,
+    threads: Optional[int] = None,
     **chip_kwargs
 ) -> Component:
     """Return chip with centered component.
@@ -27,6 +34,8 @@ def centered_chip(
         size tuple(float, float): chip size
         layer (LayerSpec): chip layer
         negative (bool): return difference between component and chip as top layer.
+        tile_size (Optional[float]): if not None, compute the negative in square tiles of this side.
+        threads (Optional[int]): threads computing the tiled negative, defaults to the CPU count.
     """
     c = gf.Component()
     top = c << gf.get_component(center_comp)
@@ -34,13 +43,16 @@ def centered_chip(
     c.align(elements="all", alignment="x")
     c.align(elements="all", alignment="y")
     if negative:
-        _ = c << subtract(chip, top)
+        if tile_size is None:
+            _ = c << subtract(chip, top)
+        else:
+            _ = c << subtract_tiled(chip, top, tile_size=tile_size, threads=threads)
         c.remove([top])
     c.add_ports(chip.ports)
     return c
 
 
-@gf.cell
+@cell
 def squares_at_corner_chip(
     center_comp: ComponentSpec = stripes_array,
     size: tuple = (2e4, 2e4),
@@ -76,7 +88,7 @@ def squares_at_corner_chip(
     return c
 
 
-@gf.cell
+@cell
 def chip_title(
     title: str = "TITLE",
     length: float = 12e3,
@@ -84,6 +96,7 @@ def chip_title(
     border_left: float = 30,
     border_top: float = 10,
     border_title: float = 100,
+    glyphs: bool = False,
 ) -> Component:
     """Return rectangle strip with padded title.
 
@@ -94,16 +107,44 @@ def chip_title(
         border_left (float): fill left border of title
         border_top (float): fill top border of title
         border_title (float): space around title
+        glyphs (bool): place the title as shared glyph cells in a window of
+            the strip drawn without booleans, if the title fits in the strip
 
     """
     c = Component()
     strip = gf.components.straight(length=length, width=width)
-    text = gf.components.text(
-        title,
-        size=width - border_top - border_title,
-        position=(border_left + border_title, -width / 2),
-    )
-    inv = gf.geometry.invert(text, border=border_title)
-    c.add_ref(gf.geometry.boolean(strip, inv, "not"))
     c.add_ports(strip.ports)
+    size = width - border_top - border_title
+    position = (border_left + border_title, -width / 2)
+    if glyphs:
+        text = label(title, size=size, position=position)
+        if (
+            strip.xmin <= text.xmin
+            and text.xmax <= strip.xmax
+            and (strip.ymin <= text.ymin and text.ymax <= strip.ymax)
+        ):
+            _add_title_background(c, strip, text.bbox, border_title)
+            c.add_ref(text)
+            return c
+    text = gf.components.text(title, size=size, position=position)
+    inv = gf.geometry.invert(text, border=border_title)
+    c.add_ref(subtract(strip, inv))
     return c
+
+
+def _add_title_background(
+    c: Component, strip: Component, bbox: np.ndarray, border: float
+) -> None:
+    """Add strip minus the title bounding box grown by border, as rectangles."""
+    (x0, y0), (x1, y1) = bbox[0] - border, bbox[1] + border
+    (sx0, sy0), (sx1, sy1) = strip.bbox
+    x0, x1 = max(x0, sx0), min(x1, sx1)
+    rectangles = [
+        ((sx0, sy0), (x0, sy1)),
+        ((x1, sy0), (sx1, sy1)),
+        ((x0, sy0), (x1, y0)),
+        ((x0, y1), (x1, sy1)),
+    ]
+    for (xa, ya), (xb, yb) in rectangles:
+        if xb > xa and yb > ya:
+            c.add_polygon([(xa, ya), (xb, ya), (xb, yb), (xa, yb)], layer="WG")
@@ -1,12 +1,16 @@
 """List of coplanar waveguide elements."""
 
+import warnings
 from functools import partial
 
 import gdsfactory as gf
 from gdsfactory import Component
-from gdsfactory.typings import ComponentFactory, ComponentSpec
+from gdsfactory.cross_section import CrossSection
+from gdsfactory.typings import ComponentFactory, ComponentSpec, CrossSectionSpec
 
+from qutegds.cell import cell
 from qutegds.geometry import subtract
+from qutegds.rules import Rule
 
 WIDTH = 6
 GAP = 3
@@ -14,10 +18,58 @@ WIDTH_PAD = 350
 GAP_PAD = 70
 SPACE_PAD = 10
 
+MIN_GAP = 2
+MIN_WIDTH = 2
+RULES = (
+    # drawn shapes are the gaps, the metal is the space between them
+    Rule("min_gap", "WG", "width", MIN_GAP),
+    Rule("min_width", "WG", "space", MIN_WIDTH),
+)
+"""Design rules of the CPW layer, checked by ``qutegds.drc.drc``."""
 
-@gf.cell
+
+def gap_cross_section(
+    width: float = WIDTH, gap: float = GAP, cross_section: CrossSectionSpec = "xs_sc"
+) -> CrossSection:
+    """
+    Return cross section made of the two gaps of a CPW.
+
+    The first section carries the ports and is centered on the path, with the
+    gap as width, so that components forwarding ``width=gap`` keep its offset.
+
+    Args:
+        width (float): width of the central CPW trace
+        gap (float): space in um between the CPW trace and ground
+        cross_section (CrossSectionSpec): cross section providing the layer
+    """
+    xs = gf.get_cross_section(cross_section)
+    offset = (width + gap) / 2
+    return xs.copy(
+        sections=(
+            xs.sections[0].model_copy(update={"width": gap, "offset": offset}),
+            gf.Section(width=gap, offset=-offset, layer=xs.layer, name="gap_bot"),
+        )
+    )
+
+
+def _analytic_gaps(
+    component_name: str, gap: float, width: float, **kwargs
+) -> Component:
+    """Return component extruded directly with the CPW gap cross section."""
+    xs = gap_cross_section(width, gap, kwargs.pop("cross_section", "xs_sc"))
+    with warnings.catch_warnings():
+        # only the first section is expected to change width
+        warnings.filterwarnings("ignore", message="CrossSection.copy")
+        return gf.get_component(component_name, cross_section=xs, width=gap, **kwargs)
+
+
+@cell
 def cpw(
-    component_name: str = "straight", gap: float = GAP, width: float = WIDTH, **kwargs
+    component_name: str = "straight",
+    gap: float = GAP,
+    width: float = WIDTH,
+    analytic: bool = False,
+    **kwargs,
 ) -> Component:
     """
     Return simple coplanar waveguide from single component.
@@ -28,12 +80,21 @@ def cpw(
         component_name (str): name of the component to be used
         width (float): width of the central CPW trace
         gap (float): space in um between the CPW trace and ground
+        analytic (bool): extrude the two gaps directly along the component path
+            instead of subtracting the inner trace from the outer one
     """
     cpw_comp = gf.Component()
-    outer = gf.get_component(component_name, width=width + 2 * gap, **kwargs)
-    inner = gf.get_component(component_name, width=width, **kwargs)
-    _ = cpw_comp << subtract(outer, inner)
-    cpw_comp.add_ports(outer.ports)
+    if analytic:
+        gaps = _analytic_gaps(component_name, gap, width, **kwargs)
+        _ = cpw_comp << gaps
+        for port in gaps.ports.values():
+            cpw_comp.add_port(port.name, port=port)
+            cpw_comp.ports[port.name].width = width + 2 * gap
+    else:
+        outer = gf.get_component(component_name, width=width + 2 * gap, **kwargs)
+        inner = gf.get_component(component_name, width=width, **kwargs)
+        _ = cpw_comp << subtract(outer, inner)
+        cpw_comp.add_ports(outer.ports)
     cpw_comp.info.update({"width": width, "gap": gap})
     return cpw_comp
 
@@ -41,7 +102,7 @@ def cpw(
 snake = partial(cpw, component_name="delay_snake")
 
 
-@gf.cell
+@cell
 def straight_taper(
     straight: ComponentSpec = gf.components.straight,
     taper: ComponentFactory = gf.components.taper,
@@ -62,7 +123,7 @@ def straight_taper(
     )
 
 
-@gf.cell
+@cell
 def rf_port(
     width1: float = WIDTH,
     width2: float = WIDTH_PAD,
@@ -71,6 +132,7 @@ def rf_port(
     len_taper: float = 200,
     len_rect: float = 100,
     space_pad: float = SPACE_PAD,
+    analytic: bool = False,
     **kwargs,
 ) -> Component:
     """Return rf port.
@@ -83,6 +145,8 @@ def rf_port(
         len_taper (float): length of the
         len_rect (float): length of the bonding pad
         space_pad (float): gap at the side of the bonding pad
+        analytic (bool): draw the gap polygon directly instead of subtracting
+            the inner launcher from the outer one
 
     .. jupyter-execute::
 
@@ -90,6 +154,10 @@ def rf_port(
         c = rf_port()
         c.plot()
     """
+    if analytic:
+        return _analytic_rf_port(
+            width1, width2, gap1, gap2, len_taper, len_rect, space_pad, **kwargs
+        )
     cpw_comp = gf.Component()
     straight = partial(gf.components.straight, **kwargs)
     taper = partial(gf.components.taper, length=len_taper, **kwargs)
@@ -109,7 +177,60 @@ def rf_port(
     return cpw_comp
 
 
-@gf.cell
+def _analytic_rf_port(
+    width1: float,
+    width2: float,
+    gap1: float,
+    gap2: float,
+    len_taper: float,
+    len_rect: float,
+    space_pad: float,
+    **kwargs,
+) -> Component:
+    """Return the rf port gap drawn as a single polygon, with the taper towards -x."""
+    cpw_comp = gf.Component()
+    layer = (
+        kwargs.get("layer")
+        or gf.get_cross_section(kwargs.get("cross_section", "xs_sc")).layer
+    )
+    x0, x2, x3 = -len_taper, len_rect, len_rect + space_pad
+    a1, a2 = width1 / 2 + gap1, width2 / 2 + gap2
+    b1, b2 = width1 / 2, width2 / 2
+    points = [
+        (0, -a2),
+        (x3, -a2),
+        (x3, a2),
+        (0, a2),
+        (x0, a1),
+        (x0, b1),
+        (0, b2),
+        (x2, b2),
+        (x2, -b2),
+        (0, -b2),
+        (x0, -b1),
+        (x0, -a1),
+    ]
+    cpw_comp.add_polygon(points, layer=layer)
+    cpw_comp.add_port(
+        name="o1",
+        center=(x0, 0),
+        width=2 * a1,
+        orientation=180,
+        layer=layer,
+        port_type="optical",
+    )
+    cpw_comp.add_port(
+        name="o2",
+        center=(x3, 0),
+        width=2 * a2,
+        orientation=0,
+        layer=layer,
+        port_type="optical",
+    )
+    return cpw_comp
+
+
+@cell
 def cpw_with_ports(
     gap: float = GAP,
     width: float = WIDTH,
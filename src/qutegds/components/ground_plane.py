@@ -0,0 +1,141 @@
+"""
+Flux trapping holes in the ground plane of a chip.
+
+.. module:: ground_plane.py
+"""
+
+import pathlib
+import tempfile
+
+import gdsfactory as gf
+import gdstk
+import klayout.db as kdb
+import numpy as np
+from gdsfactory import Component
+from gdsfactory.typings import ComponentSpec, LayerSpec
+
+from qutegds.cell import cell
+from qutegds.components.cpw_base import WIDTH_PAD
+from qutegds.components.wafer import array_rectangles
+from qutegds.geometry import DBU, scanline_spans
+
+
+def _keep_out_region(
+    component: Component,
+    layer: tuple[int, int],
+    keep_out: float,
+    max_trace_width: float,
+) -> tuple[kdb.Layout, kdb.Region]:
+    """Return layout and its layer shapes closed over traces, grown by keep_out."""
+    layout = kdb.Layout()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gdspath = pathlib.Path(tmpdir) / "chip.gds"
+        layout.read(str(component.write_gds(gdspath, logging=False)))
+    shapes = kdb.Region(layout.top_cell().begin_shapes_rec(layout.layer(*layer)))
+    closing = round(max_trace_width / 2 / layout.dbu)
+    # closing fills the traces between two gaps, which are metal to keep whole
+    region = shapes.sized(closing).sized(-closing) + shapes
+    return layout, region.sized(round(keep_out / layout.dbu))
+
+
+def hole_grid(
+    allowed: kdb.Region,
+    origin: tuple[float, float],
+    shape: tuple[int, int],
+    pitch: float,
+) -> np.ndarray:
+    """Return mask of the grid points inside a region.
+
+    Args:
+        allowed (kdb.Region): region in database units
+        origin (tuple[float, float]): first grid point in um
+        shape (tuple[int, int]): number of rows and columns of the grid
+        pitch (float): distance between grid points in um
+    """
+    rows, columns = shape
+    edges = np.array(
+        [(e.p1.x, e.p1.y, e.p2.x, e.p2.y) for e in allowed.edges()], dtype=float
+    ).reshape(-1, 4)
+    ys = (origin[1] + pitch * np.arange(rows)) / DBU
+    row, x0, x1 = scanline_spans(edges, ys)
+    # first and last column inside each span
+    start = np.ceil((x0 * DBU - origin[0]) / pitch).astype(int)
+    stop = np.floor((x1 * DBU - origin[0]) / pitch).astype(int) + 1
+    start, stop = np.clip(start, 0, columns), np.clip(stop, 0, columns)
+    keep = stop > start
+    counts = np.zeros((rows, columns + 1), dtype=int)
+    np.add.at(counts, (row[keep], start[keep]), 1)
+    np.add.at(counts, (row[keep], stop[keep]), -1)
+    return counts.cumsum(axis=1)[:, :columns] > 0
+
+
+@cell
+def flux_holes(
+    chip: ComponentSpec = "centered_chip",
+    hole_size: float = 4.0,
+    pitch: float = 40.0,
+    keep_out: float = 20.0,
+    max_trace_width: float = WIDTH_PAD,
+    layer: LayerSpec = (1, 0),
+    arrays: bool = True,
+) -> Component:
+    """Return chip with a grid of square flux trapping holes in its ground plane.
+
+    Holes are kept keep_out away from the shapes of layer, e.g. CPW gaps and
+    resonators, and from the chip boundary. Traces up to max_trace_width
+    between two gaps are kept free of holes too.
+
+    Args:
+        chip (ComponentSpec): chip to fill, e.g. ``centered_chip``
+        hole_size (float): side of the square holes
+        pitch (float): distance between the hole centers
+        keep_out (float): minimum distance between holes and the shapes of layer
+        max_trace_width (float): traces up to this width are kept without holes
+        layer (LayerSpec): layer of the holes and of the shapes to keep out from
+        arrays (bool): place the holes as array references instead of polygons
+
+    .. jupyter-execute::
+
+        from qutegds import flux_holes
+        chip = {"component": "centered_chip", "settings": {"size": (6e3, 8e3)}}
+        c = flux_holes(chip=chip, pitch=100, hole_size=20)
+        c.plot()
+    """
+    c = gf.Component()
+    chip = gf.get_component(chip)
+    _ = c << chip
+    layer = gf.get_layer(layer)
+
+    layout, keep = _keep_out_region(chip, layer, keep_out, max_trace_width)
+    (xmin, ymin), (xmax, ymax) = chip.bbox
+    boundary = kdb.Region(kdb.DBox(xmin, ymin, xmax, ymax).to_itype(layout.dbu))
+    boundary = boundary.sized(-round(keep_out / layout.dbu))
+    # hole centers must be half a hole inside the allowed region
+    allowed = (boundary - keep).sized(-round(hole_size / 2 / layout.dbu))
+
+    shape = (int((ymax - ymin) // pitch) + 1, int((xmax - xmin) // pitch) + 1)
+    origin = (
+        (xmin + xmax - (shape[1] - 1) * pitch) / 2,
+        (ymin + ymax - (shape[0] - 1) * pitch) / 2,
+    )
+    mask = hole_grid(allowed, origin, shape, pitch)
+
+    hole = gf.components.rectangle(
+        size=(hole_size, hole_size), layer=layer, centered=True
+    )
+    if arrays:
+        for column, row, n_columns, n_rows in array_rectangles(mask):
+            ref = c.add_array(
+                hole, columns=n_columns, rows=n_rows, spacing=(pitch, pitch)
+            )
+            ref.move((origin[0] + column * pitch, origin[1] + row * pitch))
+    else:
+        rows, columns = np.nonzero(mask)
+        corners = np.stack([origin[0] + columns * pitch, origin[1] + rows * pitch], 1)
+        corners = corners - hole_size / 2
+        # pylint: disable=protected-access
+        c._cell.add(
+            *(gdstk.rectangle(corner, corner + hole_size, *layer) for corner in corners)
+        )
+    c.info["holes"] = int(mask.sum())
+    return c
@@ -0,0 +1,85 @@
+"""
+Text labels placed as references to shared glyph cells.
+
+Each character is drawn once per (character, size, layer) and every label
+only holds references to these glyph cells, instead of its own polygons.
+
+.. module:: labels.py
+"""
+
+import gdsfactory as gf
+import numpy as np
+from gdsfactory import Component
+from gdsfactory.components.text import _glyph, _indent, _width
+from gdsfactory.typings import Coordinate, LayerSpec
+
+from qutegds.cell import cell
+
+LINE_SPACING = 1500
+"""Distance between text lines in font units (1000 units = size)."""
+
+
+@cell
+def glyph(
+    character: str = "A", size: float = 10.0, layer: LayerSpec = "WG"
+) -> Component:
+    """Return single character of the gdsfactory text font, at the origin.
+
+    Args:
+        character (str): printable ASCII character
+        size (float): text size in um
+        layer (LayerSpec): layer specification
+    """
+    if not 33 <= ord(character) <= 126:
+        raise ValueError(f"No character with ascii value {ord(character)!r}")
+    c = Component()
+    for poly in _glyph[ord(character)]:
+        c.add_polygon(np.array(poly) * size / 1000, layer=layer)
+    return c
+
+
+@cell
+def label(
+    text: str = "abcd",
+    size: float = 10.0,
+    position: Coordinate = (0, 0),
+    justify: str = "left",
+    layer: LayerSpec = "WG",
+) -> Component:
+    """Return text made of references to glyph cells.
+
+    Drop-in replacement for ``gf.components.text``, e.g. as resonator_label.
+
+    Args:
+        text (str): text to write, lines are separated by newlines
+        size (float): text size in um
+        position (Coordinate): position of the first line
+        justify (str): "left", "right" or "center" with respect to position
+        layer (LayerSpec): layer specification
+    """
+    justify = justify.lower()
+    if justify not in ("left", "right", "center"):
+        raise ValueError(f"justify = {justify!r} not in ('center', 'right', 'left')")
+    scaling = size / 1000
+    c = Component()
+    for n_line, line in enumerate(text.split("\n")):
+        xoffset = 0.0
+        placed = []
+        for character in line:
+            if character != " ":
+                placed.append((glyph(character, size=size, layer=layer), xoffset))
+                xoffset += (_width[ord(character)] + _indent[ord(character)]) * scaling
+            else:
+                xoffset += 500 * scaling
+        if not placed:
+            continue
+        shift = 0.0
+        if justify != "left":
+            xmin = min(g.xmin + x for g, x in placed)
+            xmax = max(g.xmax + x for g, x in placed)
+            shift = -xmax if justify == "right" else -(xmin + xmax) / 2
+        y = position[1] - n_line * LINE_SPACING * scaling
+        for g, x in placed:
+            ref = c << g
+            ref.move(gf.snap.snap_to_grid((position[0] + x + shift, y)))
+    return c
@@ -1,17 +1,23 @@
 """resonator module."""
 
+import json
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 import gdsfactory as gf
 import numpy as np
-from gdsfactory import Component
+from gdsfactory import Component, ComponentReference, logger
 from gdsfactory.routing.manhattan import round_corners
 from gdsfactory.typings import ComponentSpec, CrossSectionSpec, LayerSpec
 
+from qutegds.cache import deserialize_component, serialize_component
+from qutegds.cell import cell
 from qutegds.components.cpw_base import cpw, cpw_with_ports
+from qutegds.design import euler_bend_length, meander_l2, meander_length
+from qutegds.placement import find_collisions
 
 
-@gf.cell
+@cell
 def resonator(
     length: float = 400.0,
     L0: float = 30.0,
@@ -24,6 +30,7 @@ def resonator(
     p: float = 0.5,
     bend: ComponentSpec = "bend_euler",
     cross_section: CrossSectionSpec = "xs_sc",
+    extrude: bool = False,
     **kwargs,
 ) -> Component:
     """Return a meandering resonator.
@@ -40,6 +47,7 @@ def resonator(
         p (float): Parameter controlling the curvature of bends (default is 0.5, 0 is circle).
         bend (ComponentSpec): Type of bend used for the resonator.
         cross_section (CrossSectionSpec): Cross section specification.
+        extrude (bool): Extrude the whole meander as a single smooth path, with euler bends, instead of routing it with bend and straight references. Raises ValueError if bend or kwargs are given.
         **kwargs: Additional keyword arguments for gdsfactory.routing.manhattan.round_corners.
 
     .. code::
@@ -56,25 +64,28 @@ def resonator(
 
             |                   | dx |
     """
-    bend90 = gf.get_component(
-        bend,
-        p=p,
-        cross_section=cross_section,
-        width=width,
-        with_arc_floorplan=True,
-        radius=radius,
-    )
-
     if radius < 0:
         raise ValueError("Radius must be positive.")
     if dy < radius:
         raise ValueError("dy must be >= radius.")
-
-    curve = bend90.info[
-        "length"
-    ]  # sligthly different from a "perfect circle"(p=0) because p=0.5 by default
-    lc = dx - radius + curve + dc  # coupling termination
-    L2 = (length + L0 + 4 * n * (2 * radius - curve - dy) - lc) / (2 * n + 1) - L0
+    if extrude and (bend != "bend_euler" or kwargs):
+        raise ValueError("extrude=True only supports euler bends and no kwargs.")
+
+    if extrude:
+        curve = euler_bend_length(radius, p)
+    else:
+        bend90 = gf.get_component(
+            bend,
+            p=p,
+            cross_section=cross_section,
+            width=width,
+            with_arc_floorplan=True,
+            radius=radius,
+        )
+        curve = bend90.info[
+            "length"
+        ]  # sligthly different from a "perfect circle"(p=0) because p=0.5 by default
+    L2 = meander_l2(length, curve, L0, n, dy, dx, dc, radius)
     if L2 < 0:
         raise ValueError(
             "Snake is too short: either reduce L0, dy, n or increase the total length."
@@ -89,6 +100,22 @@ def resonator(
         path += [(-L0, y), (L2, y)]
     path += [(L2 + dx, y), (L2 + dx, y + radius + dc)]
 
+    if extrude:
+        smooth = gf.path.smooth(
+            np.array(path).round(2),
+            radius=radius,
+            bend=gf.path.euler,
+            p=p,
+            use_eff=True,
+        )
+        c = smooth.extrude(
+            cross_section=gf.get_cross_section(cross_section, width=width)
+        )
+        # same bookkeeping as the routed meander, summing rounded bend lengths
+        length = meander_length(np.round(L2, 2), curve, L0, n, dy, dx, dc, radius)
+        c.info.update({"length": float(np.round(length, 3))})
+        return c
+
     c = gf.Component()
     route = round_corners(
         points=list(np.array(path).round(2)),
@@ -105,7 +132,24 @@ def resonator(
     return c
 
 
-@gf.cell
+def chord_npoints(radius: float, angle: float, max_chord_error: float) -> int:
+    """Return fewest points sampling an arc within a maximum chord error.
+
+    Args:
+        radius (float): of the arc in um.
+        angle (float): of the arc in degrees.
+        max_chord_error (float): maximum distance in nm between arc and chords,
+            never finer than the grid of the active PDK.
+    """
+    # vertices are snapped to the PDK grid when writing
+    error = max(max_chord_error * 1e-3, gf.get_active_pdk().grid_size)
+    if error >= radius:
+        return 2
+    step = np.degrees(2 * np.arccos(1 - error / radius))
+    return int(np.ceil(angle / step)) + 1
+
+
+@cell
 def termination_open(
     width: float = 10,
     angle_resolution: float = 1,
@@ -113,6 +157,7 @@ def termination_open(
     dt: float = 3,
     r: float = 4,
     layer: LayerSpec = (1, 0),
+    max_chord_error: Optional[float] = None,
 ) -> Component:
     """Generate an open-circuit termination for a cpw.
 
@@ -123,6 +168,10 @@ def termination_open(
         dt (float): termination longitudinal extension.
         r (float): radius of the termination curvatures.
         layer (LayerSpec): layer specification.
+        max_chord_error (Optional[float]): if not None, use the fewest points
+            within this error in nm instead of angle_resolution. The difference
+            with the points of angle_resolution is recorded as the signed
+            ``vertices_saved`` info, negative if angle_resolution is coarser.
     """
     if width <= 0:
         raise ValueError(f"width={width} must be positive.")
@@ -130,13 +179,21 @@ def termination_open(
         raise ValueError(f"radius={r} must be < (width/2 + gap) = {width/2+gap}")
     c = Component()
 
-    t_inner = np.linspace(0, np.pi, int(180 / angle_resolution) + 1)
+    n_inner = int(180 / angle_resolution) + 1
+    n_outer = int(90 / angle_resolution) + 1
+    n_fixed = n_inner + 2 * n_outer + 2
+    if max_chord_error is not None:
+        n_inner = chord_npoints(width / 2, 180, max_chord_error)
+        n_outer = chord_npoints(r, 90, max_chord_error)
+        c.info["vertices_saved"] = n_fixed - (n_inner + 2 * n_outer + 2)
+
+    t_inner = np.linspace(0, np.pi, n_inner)
     xpts = list(width / 2 * np.cos(t_inner))
     ypts = list(width / 2 * np.sin(t_inner))
     xpts.append(-width / 2 - gap)
     ypts.append(0)
 
-    t_outer = np.linspace(0, np.pi / 2, int(90 / angle_resolution) + 1)
+    t_outer = np.linspace(0, np.pi / 2, n_outer)
     xpts_aux = width / 2 + gap + r * (np.cos(t_outer) - 1)
     ypts_aux = list(width / 2 + dt + r * (np.sin(t_outer) - 1))
 
@@ -157,12 +214,13 @@ def termination_open(
     return c
 
 
-@gf.cell
+@cell
 def termination_closed(
     width: float = 10,
     angle_resolution: float = 1,
     gap: float = 5,
     layer: LayerSpec = (1, 0),
+    max_chord_error: Optional[float] = None,
 ) -> Component:
     """Generate an closed-circuit CPW termination.
 
@@ -171,11 +229,20 @@ def termination_closed(
         angle_resolution (float): number of degrees per point.
         gap (float): of the terminated cpw.
         layer (LayerSpec): layer specification.
+        max_chord_error (Optional[float]): if not None, use the fewest points
+            within this error in nm instead of angle_resolution. The difference
+            with the points of angle_resolution is recorded as the signed
+            ``vertices_saved`` info, negative if angle_resolution is coarser.
     """
     if width <= 0:
         raise ValueError(f"width={width} must be > 0")
     c = Component()
-    t = np.linspace(0, np.pi, int(360 / angle_resolution) + 1)
+    npoints = int(360 / angle_resolution) + 1
+    if max_chord_error is not None:
+        n_fixed = npoints
+        npoints = chord_npoints(gap / 2, 180, max_chord_error)
+        c.info["vertices_saved"] = 2 * (n_fixed - npoints)
+    t = np.linspace(0, np.pi, npoints)
     xpts = -width / 2 - gap / 2 + gap / 2 * np.cos(t)
     ypts = gap / 2 * np.sin(t)
     _ = c.add_polygon(points=(xpts, ypts), layer=layer)
@@ -194,7 +261,7 @@ def termination_closed(
     return c
 
 
-@gf.cell
+@cell
 def resonator_cpw(
     width: float = 6.0,
     gap: float = 3.0,
@@ -224,7 +291,40 @@ def resonator_cpw(
     return c
 
 
-@gf.cell
+def _serialized_resonator_cpw(kwargs: dict) -> tuple[bytes, dict]:
+    """Build resonator_cpw in a worker process and return it serialized."""
+    return serialize_component(resonator_cpw(**kwargs))
+
+
+def build_resonators_parallel(
+    resonators_kwargs: list[dict], max_workers: Optional[int] = None
+) -> list[Component]:
+    """Build distinct resonator_cpw cells in a process pool.
+
+    Each cell is serialized in the worker and loaded back into the parent
+    cell cache under its usual name, so that later ``resonator_cpw`` calls
+    with the same arguments return it without building.
+
+    Args:
+        resonators_kwargs (list[dict]): keyword arguments of each resonator_cpw.
+        max_workers (Optional[int]): number of worker processes, defaults to the CPU count.
+    """
+    distinct = {
+        json.dumps(kwargs, sort_keys=True, default=str): kwargs
+        for kwargs in resonators_kwargs
+    }
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        built = dict(
+            zip(distinct, pool.map(_serialized_resonator_cpw, distinct.values()))
+        )
+    loaded = {key: deserialize_component(*built[key]) for key in distinct}
+    return [
+        loaded[json.dumps(kwargs, sort_keys=True, default=str)]
+        for kwargs in resonators_kwargs
+    ]
+
+
+@cell
 def resonator_array(
     resonators_attrs: dict[str, list],
     central_cpw: ComponentSpec = cpw_with_ports,
@@ -233,8 +333,12 @@ def resonator_array(
     distance: float = 5.0,
     start_x: Optional[float] = None,
     resonator_indexes: Optional[list] = None,
-    resonator_label: ComponentSpec = "text",
+    resonator_label: ComponentSpec = "label",
     labels_y_offset: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    clearance: Optional[float] = None,
+    auto_spacing: bool = False,
+    strict: bool = False,
     **resonator_kwargs,
 ) -> Component:
     """
@@ -250,34 +354,86 @@ def resonator_array(
         resonator_indexes (Optional[list]): List of indexes for reordering the resonators.
         resonator_label (ComponentSpec): labels for the resonators based on their order indexes.
         labels_y_offset (Optional[float]): add labels at this distance from central CPW if not None.
+        max_workers (Optional[int]): build the resonators in this many worker processes if not None.
+        clearance (Optional[float]): if not None, check that resonators, labels and central CPW are at least this far apart.
+        auto_spacing (bool): use the minimum spacing keeping the bounding boxes of neighbouring resonators and labels clearance apart.
+        strict (bool): raise ValueError on clearance violations instead of logging a warning.
         **resonator_kwargs: additional keyword arguments common to all resonators.
     """
     c = gf.Component()
     central = c << gf.get_component(central_cpw)
     n_res = len(list(resonators_attrs.values())[0])
-    if start_x is None:
-        start_x = (central.info["cpw_length"] - spacing * (n_res - 1)) / 2
     if resonator_indexes is None:
         resonator_indexes = list(range(n_res))
     assert len(resonator_indexes) == n_res
 
     dy_central = central.info["width"] / 2 + central.info["gap"]
+    resonators_kwargs = [
+        {key: item[i] for key, item in resonators_attrs.items()} | resonator_kwargs
+        for i in range(n_res)
+    ]
+    if max_workers is not None:
+        build_resonators_parallel(resonators_kwargs, max_workers=max_workers)
+    placed: dict[tuple[str, int], ComponentReference] = {}
     for i in resonator_indexes:
-        specific_attrs = {key: item[i] for key, item in resonators_attrs.items()}
-        res = c << resonator_cpw(**specific_attrs, **resonator_kwargs)
+        res = c << resonator_cpw(**resonators_kwargs[i])
         res.rotate(-90)
         res.movey(-res.ymin + dy_central + distance)
         if i % 2 == 0:
-            movex = i * spacing + start_x
-            res.movex(movex)
             res.mirror_y()
         else:
-            movex = i * spacing + start_x + shift_x_top_bot
-            res.movex(movex)
+            res.movex(shift_x_top_bot)
+        placed["resonator", i] = res
 
-        if resonator_label:
+        if resonator_label and labels_y_offset is not None:
             lab = c << gf.get_component(resonator_label, text=f"R{i}")
-            lab.movex(movex)
             lab.movey((lab.ymin + lab.ymax) / 2 + (-1) ** (i % 2 + 1) * labels_y_offset)
+            if i % 2:
+                lab.movex(shift_x_top_bot)
+            placed["label", i] = lab
 
+    if auto_spacing:
+        spacing = _minimum_spacing(placed, n_res, clearance or 0)
+        c.info["spacing"] = spacing
+    if start_x is None:
+        start_x = (central.info["cpw_length"] - spacing * (n_res - 1)) / 2
+    for (_, i), ref in placed.items():
+        ref.movex(i * spacing + start_x)
+
+    if clearance is not None:
+        collisions = find_collisions({("central", -1): central} | placed, clearance)
+        c.info["collisions"] = [
+            f"{_placed_name(*a)} / {_placed_name(*b)}" for a, b in collisions
+        ]
+        if collisions:
+            message = f"Closer than clearance={clearance}: {c.info['collisions']}"
+            if strict:
+                raise ValueError(message)
+            logger.warning(message)
     return c
+
+
+def _placed_name(kind: str, index: int) -> str:
+    """Return name of a placed reference in the collision reports."""
+    if kind == "central":
+        return kind
+    if kind == "resonator":
+        return f"R{index}"
+    return f"{kind} R{index}"
+
+
+def _minimum_spacing(
+    placed: dict[tuple[str, int], ComponentReference], n_res: int, clearance: float
+) -> float:
+    """Return spacing keeping resonators on the same side clearance apart.
+
+    Resonators alternate above and below the central CPW, so each one only
+    neighbours the resonators two positions away along x.
+    """
+    left, right = np.zeros(n_res), np.zeros(n_res)
+    for (_, i), ref in placed.items():
+        left[i] = max(left[i], -ref.xmin)
+        right[i] = max(right[i], ref.xmax)
+    if n_res < 3:
+        return 0.0
+    return float(np.max(right[:-2] + left[2:] + clearance) / 2)
@@ -7,8 +7,10 @@ Chip with straight stripes for DC characterization.
 import gdsfactory as gf
 from gdsfactory import Component, logger
 
+from qutegds.cell import cell
 
-@gf.cell
+
+@cell
 def strip_with_pads(
     length: float = 2e3,
     width: float = 2,
@@ -55,7 +57,7 @@ def strip_with_pads(
     return c
 
 
-@gf.cell
+@cell
 def stripes_array(
     widths: float | list = 1, spacing: float = 2000, **kwargs
 ) -> Component:
@@ -0,0 +1,114 @@
+"""
+Wafer layouts tiling chips as array references.
+
+.. module:: wafer.py
+"""
+
+from typing import Optional
+
+import gdsfactory as gf
+import numpy as np
+from gdsfactory import Component
+from gdsfactory.typings import ComponentSpec
+
+from qutegds.cell import cell
+
+
+def array_rectangles(mask: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """Return rectangles of adjacent True sites covering a boolean grid.
+
+    Consecutive rows with the same runs of True columns share a rectangle, so
+    that a full grid is covered by a single rectangle and every hole in it only
+    adds a few more.
+
+    Args:
+        mask (np.ndarray): boolean array of shape (rows, columns)
+
+    Returns:
+        list of (column, row, columns, rows) tuples
+    """
+    rectangles = []
+    open_runs: dict[tuple[int, int], int] = {}
+    for row, line in enumerate(np.vstack([mask, np.zeros(mask.shape[1], bool)])):
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], line.astype(int), [0]])))
+        runs = set(zip(edges[::2], edges[1::2]))
+        for start, stop in set(open_runs) - runs:
+            first_row = open_runs.pop((start, stop))
+            rectangles.append((start, first_row, stop - start, row - first_row))
+        for run in runs - set(open_runs):
+            open_runs[run] = row
+    return sorted(rectangles, key=lambda r: (r[1], r[0]))
+
+
+@cell
+def wafer(
+    die: ComponentSpec = "centered_chip",
+    columns: int = 3,
+    rows: int = 3,
+    pitch: Optional[tuple[float, float]] = None,
+    overrides: Optional[list] = None,
+    diameter: Optional[float] = None,
+    replace: bool = False,
+) -> Component:
+    """Return grid of dies placed as array references.
+
+    Identical dies are placed as a few GDS arrays (AREF), so that references,
+    memory and file size grow with the number of distinct dies only. Sites
+    listed in overrides get a sparse layer of references on top of their die,
+    e.g. a title, centered on the site.
+
+    Args:
+        die (ComponentSpec): die repeated on the grid
+        columns (int): number of columns of the grid
+        rows (int): number of rows of the grid
+        pitch (Optional[tuple[float, float]]): distance between sites, defaults to the die size
+        overrides (Optional[list]): (column, row, ComponentSpec) triplets of components placed on the sites
+        diameter (Optional[float]): if not None, only keep dies fully inside a centered circle of this diameter
+        replace (bool): overrides replace the die of their site instead of being placed on top
+
+    .. jupyter-execute::
+
+        from qutegds import wafer
+        c = wafer(overrides=[(1, 1, {"component": "label", "settings": {"text": "B2"}})])
+        c.plot()
+    """
+    c = gf.Component()
+    base = gf.get_component(die)
+    size = np.array(base.size)
+    spacing = size if pitch is None else np.array(pitch, dtype=float)
+
+    # lower left corners of the sites
+    xs = np.arange(columns) * spacing[0] - ((columns - 1) * spacing[0] + size[0]) / 2
+    ys = np.arange(rows) * spacing[1] - ((rows - 1) * spacing[1] + size[1]) / 2
+    mask = np.ones((rows, columns), dtype=bool)
+    if diameter is not None:
+        x, y = np.meshgrid(xs, ys)
+        corners = [
+            (x, y),
+            (x + size[0], y),
+            (x, y + size[1]),
+            (x + size[0], y + size[1]),
+        ]
+        for cx, cy in corners:
+            mask &= np.hypot(cx, cy) <= diameter / 2
+    override_sites = {(column, row): spec for column, row, spec in overrides or []}
+    for column, row in override_sites:
+        if not (0 <= column < columns and 0 <= row < rows):
+            raise ValueError(f"Override site {(column, row)} outside of the grid")
+    sites = mask.copy()
+    if replace:
+        for column, row in override_sites:
+            sites[row, column] = False
+
+    rectangles = array_rectangles(sites)
+    for column, row, n_columns, n_rows in rectangles:
+        ref = c.add_array(base, columns=n_columns, rows=n_rows, spacing=tuple(spacing))
+        ref.move((xs[column] - base.xmin, ys[row] - base.ymin))
+    for (column, row), spec in override_sites.items():
+        if mask[row, column]:
+            ref = c << gf.get_component(spec)
+            ref.center = (xs[column] + size[0] / 2, ys[row] + size[1] / 2)
+
+    c.info["dies"] = int(mask.sum())
+    c.info["arrays"] = len(rectangles)
+    return c
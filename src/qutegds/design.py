@@ -0,0 +1,164 @@
+"""
+Inverse design of meandering resonators without building geometry.
+
+.. module:: design.py
+"""
+
+import functools
+from typing import NamedTuple, Optional, TypeVar
+
+import gdsfactory as gf
+import numpy as np
+from numpy.typing import ArrayLike
+
+SPEED_OF_LIGHT = 299_792_458e6
+"""Speed of light in vacuum (um/s)."""
+
+Array = TypeVar("Array", float, np.ndarray)
+
+
+@functools.cache
+def euler_bend_length(radius: float, p: float = 0.5) -> float:
+    """Return length of the 90 degrees euler bend used by ``resonator``.
+
+    Matches ``bend_euler(radius=radius, p=p, with_arc_floorplan=True).info["length"]``.
+
+    Args:
+        radius (float): effective radius of the bend.
+        p (float): fraction of the bend following the euler spiral.
+    """
+    path = gf.path.euler(radius=radius, angle=90, p=p, use_eff=True)
+    return float(np.round(path.length(), 3))
+
+
+def euler_bend_lengths(radius: ArrayLike, p: ArrayLike = 0.5) -> np.ndarray:
+    """Return euler bend lengths, computing each distinct (radius, p) once.
+
+    Args:
+        radius (ArrayLike): effective radii of the bends.
+        p (ArrayLike): fractions of the bends following the euler spiral.
+    """
+    radius, p = np.broadcast_arrays(np.asarray(radius, float), np.asarray(p, float))
+    pairs, inverse = np.unique(
+        np.stack([radius.ravel(), p.ravel()], axis=1), axis=0, return_inverse=True
+    )
+    table = np.array([euler_bend_length(r, q) for r, q in pairs])
+    return table[inverse.ravel()].reshape(radius.shape)
+
+
+def quarter_wave_length(frequency: ArrayLike, eps_eff: ArrayLike) -> np.ndarray:
+    """Return length (um) of a quarter-wave resonator.
+
+    Args:
+        frequency (ArrayLike): resonance frequency (Hz).
+        eps_eff (ArrayLike): effective permittivity of the line.
+    """
+    return SPEED_OF_LIGHT / (4 * np.asarray(frequency) * np.sqrt(eps_eff))
+
+
+def meander_l2(
+    length: Array,
+    curve: Array,
+    L0: Array,
+    n: Array,
+    dy: Array,
+    dx: Array,
+    dc: Array,
+    radius: Array,
+) -> Array:
+    """Return length of the long meander straights giving a total length.
+
+    Works on scalars and NumPy arrays alike, see ``resonator`` for the
+    meaning of the arguments.
+
+    Args:
+        length (float | np.ndarray): total length of the resonator.
+        curve (float | np.ndarray): length of a single bend.
+        L0 (float | np.ndarray): Length of the straight section.
+        n (float | np.ndarray): Number of meander loops.
+        dy (float | np.ndarray): Half-distance between bends.
+        dx (float | np.ndarray): Distance between the coupling section and the first bend.
+        dc (float | np.ndarray): Length of the final coupling section of the resonator.
+        radius (float | np.ndarray): Radius of the bends.
+    """
+    lc = dx - radius + curve + dc  # coupling termination
+    return (length + L0 + 4 * n * (2 * radius - curve - dy) - lc) / (2 * n + 1) - L0
+
+
+def meander_length(
+    L2: Array,
+    curve: Array,
+    L0: Array,
+    n: Array,
+    dy: Array,
+    dx: Array,
+    dc: Array,
+    radius: Array,
+) -> Array:
+    """Return total length of a meander, inverse of ``meander_l2``.
+
+    Args:
+        L2 (float | np.ndarray): length of the long meander straights.
+        curve (float | np.ndarray): length of a single bend.
+        L0 (float | np.ndarray): Length of the straight section.
+        n (float | np.ndarray): Number of meander loops.
+        dy (float | np.ndarray): Half-distance between bends.
+        dx (float | np.ndarray): Distance between the coupling section and the first bend.
+        dc (float | np.ndarray): Length of the final coupling section of the resonator.
+        radius (float | np.ndarray): Radius of the bends.
+    """
+    lc = dx - radius + curve + dc
+    return (L2 + L0) * (2 * n + 1) - L0 - 4 * n * (2 * radius - curve - dy) + lc
+
+
+class ResonatorDesign(NamedTuple):
+    """Batch of resonator parameters."""
+
+    L2: np.ndarray
+    """Length of the long meander straights."""
+    feasible: np.ndarray
+    """Mask of parameters accepted by ``resonator``."""
+    length: np.ndarray
+    """Length achieved once L2 is rounded as in ``resonator``."""
+
+
+def resonator_parameters(
+    length: Optional[ArrayLike] = None,
+    frequency: Optional[ArrayLike] = None,
+    eps_eff: Optional[ArrayLike] = None,
+    L0: ArrayLike = 30.0,
+    n: ArrayLike = 1,
+    dy: ArrayLike = 15,
+    dx: ArrayLike = 40,
+    dc: ArrayLike = 5,
+    radius: ArrayLike = 10,
+    p: ArrayLike = 0.5,
+) -> ResonatorDesign:
+    """Solve ``resonator`` parameters for a batch of target lengths or frequencies.
+
+    All arguments are broadcast against each other.
+
+    Args:
+        length (Optional[ArrayLike]): target total lengths.
+        frequency (Optional[ArrayLike]): target quarter-wave frequencies (Hz), used if length is None.
+        eps_eff (Optional[ArrayLike]): effective permittivity, required with frequency.
+        L0 (ArrayLike): Length of the straight section.
+        n (ArrayLike): Number of meander loops.
+        dy (ArrayLike): Half-distance between bends.
+        dx (ArrayLike): Distance between the coupling section and the first bend.
+        dc (ArrayLike): Length of the final coupling section of the resonator.
+        radius (ArrayLike): Radius of the bends.
+        p (ArrayLike): Parameter controlling the curvature of bends.
+    """
+    if length is None:
+        if frequency is None or eps_eff is None:
+            raise ValueError("Either length or both frequency and eps_eff are needed.")
+        length = quarter_wave_length(frequency, eps_eff)
+    length, L0, n, dy, dx, dc, radius, p = np.broadcast_arrays(
+        *(np.asarray(v, float) for v in (length, L0, n, dy, dx, dc, radius, p))
+    )
+    curve = euler_bend_lengths(radius, p)
+    L2 = meander_l2(length, curve, L0, n, dy, dx, dc, radius)
+    feasible = (L2 >= 0) & (radius >= 0) & (dy >= radius)
+    achieved = meander_length(L2.round(2), curve, L0, n, dy, dx, dc, radius)
+    return ResonatorDesign(L2=L2, feasible=feasible, length=achieved)
@@ -0,0 +1,113 @@
+"""
+Fast width and space checks of built components.
+
+Rules are run by KLayout on square tiles in parallel threads. Each tile sees
+the shapes within a border as wide as the largest rule around it, and only
+keeps the violations centered inside it, so that none is lost or repeated::
+
+    from qutegds.drc import drc
+
+    result = drc(resonator_array(...))
+    print(result.counts)
+
+.. module:: drc.py
+"""
+
+import os
+import pathlib
+import tempfile
+from typing import NamedTuple, Optional
+
+import gdsfactory as gf
+import klayout.db as kdb
+import numpy as np
+
+from qutegds.components.cpw_base import RULES
+from qutegds.rules import Rule
+
+KINDS = ("width", "space")
+
+
+class DRCResult(NamedTuple):
+    """Violations of a set of rules."""
+
+    markers: dict[str, list[np.ndarray]]
+    """Merged polygons (um) marking the violations of each rule."""
+    counts: dict[str, int]
+    """Number of markers of each rule."""
+
+    @property
+    def clean(self) -> bool:
+        """Whether no rule is violated."""
+        return not any(self.counts.values())
+
+
+class _Markers(kdb.TileOutputReceiver):
+    """Collect edge pairs centered in their tile."""
+
+    def __init__(self):
+        self.edge_pairs = kdb.EdgePairs()
+
+    def put(self, ix, iy, tile, obj, dbu, clip):  # pylint: disable=unused-argument
+        for edge_pair in obj.each():
+            if tile.contains(edge_pair.bbox().center()):
+                self.edge_pairs.insert(edge_pair)
+
+
+def drc(
+    component: gf.Component,
+    rules: Optional[list[Rule]] = None,
+    tile_size: float = 2000.0,
+    threads: Optional[int] = None,
+) -> DRCResult:
+    """Return violations of width and space rules.
+
+    Args:
+        component (gf.Component): component to check, its hierarchy is flattened
+        rules (Optional[list[Rule]]): rules to check, defaults to the CPW rules of ``cpw_base.RULES``
+        tile_size (float): side of the square tiles in um
+        threads (Optional[int]): number of threads, defaults to the CPU count
+    """
+    if rules is None:
+        rules = list(RULES)
+    for rule in rules:
+        if rule.kind not in KINDS:
+            raise ValueError(f"Rule {rule.name!r}: kind={rule.kind!r} not in {KINDS}")
+
+    layout = kdb.Layout()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gdspath = pathlib.Path(tmpdir) / "drc.gds"
+        layout.read(str(component.write_gds(gdspath, logging=False)))
+    top = layout.top_cell()
+
+    processor = kdb.TilingProcessor()
+    processor.dbu = layout.dbu
+    processor.tile_size(tile_size, tile_size)
+    border = max((rule.value for rule in rules), default=0)
+    processor.tile_border(border, border)
+    processor.threads = threads or os.cpu_count() or 1
+    receivers = {}
+    layers: dict[tuple[int, int], str] = {}
+    for n, rule in enumerate(rules):
+        layer = gf.get_layer(rule.layer)
+        if layer not in layers:
+            layers[layer] = f"l{len(layers)}"
+            processor.input(
+                layers[layer], layout, top.cell_index(), layout.layer(*layer)
+            )
+        receivers[rule.name] = _Markers()
+        processor.output(f"o{n}", receivers[rule.name])
+        distance = round(rule.value / layout.dbu)
+        processor.queue(f"_output(o{n}, {layers[layer]}.{rule.kind}_check({distance}))")
+    processor.execute("drc")
+
+    # pieces of a violation found in neighbouring tiles overlap in the border
+    markers = {
+        name: [
+            np.array([(p.x, p.y) for p in polygon.each_point_hull()]) * layout.dbu
+            for polygon in receiver.edge_pairs.polygons().merged().each()
+        ]
+        for name, receiver in receivers.items()
+    }
+    counts = {name: len(polygons) for name, polygons in markers.items()}
+    return DRCResult(markers=markers, counts=counts)
@@ -0,0 +1,352 @@
+"""
+Streaming export of large layouts, one cell at a time.
+
+Cells are written as soon as they are finished, leaf cells first, so that a
+full wafer never needs to be held in memory as a single component::
+
+    from qutegds.export import write_stream
+
+    def dies():
+        for i in range(100):
+            yield chip_title(title=f"D{i}"), (0, 600 * i)
+
+    write_stream(dies(), "wafer.gds.gz")
+
+``write_incremental`` instead rewrites a GDS library after an edit by only
+serializing the cells whose content changed, unchanged cells being copied
+byte for byte from the previous file.
+
+.. module:: export.py
+"""
+
+import contextlib
+import datetime
+import gzip
+import json
+import os
+import pathlib
+import shutil
+import struct
+import tempfile
+from collections.abc import Iterable, Iterator
+
+import gdstk
+import klayout.db as kdb
+import numpy as np
+from gdsfactory import Component
+
+from qutegds.cell import forget
+from qutegds.geometry import cell_hashes
+
+FORMATS = ("gds", "gds.gz", "oas")
+TIMESTAMP = datetime.datetime.fromtimestamp(1572014192.8273)
+"""Timestamp written in the GDS headers, as gdsfactory does, for reproducible files."""
+MANIFEST_SUFFIX = ".manifest.json"
+"""Suffix of the manifest written next to incremental GDS libraries."""
+BGNSTR, STRNAME, ENDSTR, ENDLIB = 0x05, 0x06, 0x07, 0x04
+"""GDS record types delimiting the cells and the library."""
+
+
+def _format(path: pathlib.Path) -> str:
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if path.name.endswith(f".{fmt}"):
+            return fmt
+    raise ValueError(f"{path.name!r} does not end with one of {FORMATS}")
+
+
+class StreamWriter:
+    """Writer of GDS or OASIS files filled one placed component at a time.
+
+    Every placed component is written with its not yet written dependencies,
+    leaf cells first, and only its name is kept afterwards. A freed cell that
+    is needed again is rebuilt under the same name, and not written twice.
+    The top cell only holds references by name and is written on close.
+
+    GDS is streamed to disk directly, ``.gds.gz`` is compressed chunk by chunk
+    on close. OASIS files are converted by KLayout from the streamed GDS on
+    close, with CBLOCK compression: KLayout then holds the finished hierarchy,
+    which is far smaller than the gdsfactory components.
+
+    Args:
+        path (str | pathlib.Path): output file, ending in .gds, .gds.gz or .oas
+        top (str): name of the top cell
+        free (bool): drop written cells from the gdsfactory cache
+        unit (float): user units in meters
+        precision (float): database units in meters
+        max_points (int): maximum number of vertices per polygon
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        top: str = "TOP",
+        free: bool = True,
+        unit: float = 1e-6,
+        precision: float = 1e-9,
+        max_points: int = 4000,
+    ):
+        """Open the output file, the top cell is only written on close."""
+        self.path = pathlib.Path(path)
+        self.fmt = _format(self.path)
+        self.free = free
+        self.closed = False
+        self.written: set[str] = set()
+        self._top = gdstk.Cell(top)
+        self._tmpdir = None
+        gdspath = self.path
+        if self.fmt != "gds":
+            self._tmpdir = tempfile.TemporaryDirectory()
+            gdspath = pathlib.Path(self._tmpdir.name) / "stream.gds"
+        self._writer = gdstk.GdsWriter(
+            gdspath,
+            name="library",
+            unit=unit,
+            precision=precision,
+            max_points=max_points,
+            timestamp=TIMESTAMP,
+        )
+        self._gdspath = gdspath
+
+    def __enter__(self) -> "StreamWriter":
+        """Return the writer, closed on exit."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        """Close the writer."""
+        self.close()
+
+    def write(self, component: Component) -> None:
+        """Write a component and its unwritten dependencies, leaf cells first."""
+        stack = [(component._cell, False)]  # pylint: disable=protected-access
+        while stack:
+            gds_cell, expanded = stack.pop()
+            if gds_cell.name in self.written:
+                continue
+            if expanded:
+                self._writer.write(gds_cell)
+                self.written.add(gds_cell.name)
+                if self.free:
+                    forget(gds_cell.name)
+                continue
+            stack.append((gds_cell, True))
+            stack.extend(
+                (ref.cell, False)
+                for ref in gds_cell.references
+                if ref.cell.name not in self.written
+            )
+
+    def place(
+        self,
+        component: Component,
+        origin: tuple[float, float] = (0, 0),
+        rotation: float = 0,
+        x_reflection: bool = False,
+    ) -> None:
+        """Write a component if needed and reference it from the top cell.
+
+        Args:
+            component (Component): component to place
+            origin (tuple[float, float]): position of the component origin
+            rotation (float): rotation in degrees
+            x_reflection (bool): mirror across the x axis before rotating
+        """
+        self.write(component)
+        self._top.add(
+            gdstk.Reference(
+                component.name,
+                origin=origin,
+                rotation=np.deg2rad(rotation),
+                x_reflection=x_reflection,
+            )
+        )
+
+    def close(self) -> pathlib.Path:
+        """Write the top cell, finish the file and return its path."""
+        if self.closed:
+            return self.path
+        self._writer.write(self._top)
+        self._writer.close()
+        self.closed = True
+        if self.fmt == "gds.gz":
+            with open(self._gdspath, "rb") as fin, gzip.open(self.path, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+        elif self.fmt == "oas":
+            layout = kdb.Layout()
+            layout.read(str(self._gdspath))
+            options = kdb.SaveLayoutOptions()
+            options.format = "OASIS"
+            options.oasis_compression_level = 10
+            options.oasis_write_cblocks = True
+            options.oasis_strict_mode = True
+            layout.write(str(self.path), options)
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+        return self.path
+
+
+def write_stream(
+    dies: Iterable[Component | tuple],
+    path: str | pathlib.Path,
+    top: str = "TOP",
+    free: bool = True,
+) -> pathlib.Path:
+    """Write placed components, e.g. from a generator, to a layout file.
+
+    Args:
+        dies (Iterable[Component | tuple]): components, or (component, origin) and
+            (component, origin, rotation) tuples, produced one at a time
+        path (str | pathlib.Path): output file, ending in .gds, .gds.gz or .oas
+        top (str): name of the top cell
+        free (bool): drop written cells from the gdsfactory cache
+    """
+    with StreamWriter(path, top=top, free=free) as writer:
+        for die in dies:
+            if isinstance(die, Component):
+                die = (die,)
+            writer.place(*die)
+    return writer.path
+
+
+def _dependencies(component: Component) -> list[gdstk.Cell]:
+    """Return cells of a hierarchy, each after the cells it references."""
+    order, seen = [], set()
+    stack = [(component._cell, False)]  # pylint: disable=protected-access
+    while stack:
+        gds_cell, expanded = stack.pop()
+        if expanded:
+            order.append(gds_cell)
+        elif gds_cell.name not in seen:
+            seen.add(gds_cell.name)
+            stack.append((gds_cell, True))
+            stack.extend((ref.cell, False) for ref in reversed(gds_cell.references))
+    return order
+
+
+def _records(data: bytes) -> Iterator[tuple[int, int, int]]:
+    """Yield offset, length and type of the records of GDS bytes."""
+    offset = 0
+    while offset < len(data):
+        length, kind = struct.unpack_from(">HB", data, offset)
+        yield offset, length, kind
+        if kind == ENDLIB:
+            return
+        offset += length
+
+
+def _split_cells(data: bytes) -> tuple[bytes, dict[str, bytes], bytes]:
+    """Return library header, records of each cell by name, and library footer."""
+    header_end, cells, start, name = None, {}, 0, ""
+    footer_start = len(data)
+    for offset, length, kind in _records(data):
+        if kind == BGNSTR:
+            header_end = offset if header_end is None else header_end
+            start = offset
+        elif kind == STRNAME:
+            name = data[offset + 4 : offset + length].rstrip(b"\0").decode()
+        elif kind == ENDSTR:
+            cells[name] = data[start : offset + length]
+        elif kind == ENDLIB:
+            footer_start = offset
+            header_end = offset if header_end is None else header_end
+    return data[:header_end], cells, data[footer_start:]
+
+
+def _serialize(cells: list[gdstk.Cell], **kwargs) -> bytes:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gdspath = pathlib.Path(tmpdir) / "cells.gds"
+        writer = gdstk.GdsWriter(gdspath, name="library", timestamp=TIMESTAMP, **kwargs)
+        for gds_cell in cells:
+            writer.write(gds_cell)
+        writer.close()
+        return gdspath.read_bytes()
+
+
+def _load_manifest(path: pathlib.Path, settings: dict) -> dict:
+    """Return manifest of a library, or an empty one if it does not match the file."""
+    manifest_path = path.with_name(path.name + MANIFEST_SUFFIX)
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        stat = path.stat()
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if (
+        manifest.get("settings") != settings
+        or manifest.get("size") != stat.st_size
+        or manifest.get("mtime_ns") != stat.st_mtime_ns
+    ):
+        return {}
+    return manifest
+
+
+def write_incremental(
+    component: Component,
+    path: str | pathlib.Path,
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    max_points: int = 4000,
+) -> dict[str, list[str]]:
+    """Write a GDS library, serializing only the cells changed since the last write.
+
+    A manifest next to the library records the content hash (see
+    ``geometry.cell_hashes``) and the byte range of each cell. Cells whose
+    hash did not change are copied from the previous file, the others, which
+    include the ancestors of every changed cell, are serialized again. The
+    result is byte for byte the same as a full write.
+
+    Args:
+        component (Component): top cell of the library
+        path (str | pathlib.Path): output GDS file
+        unit (float): user units in meters
+        precision (float): database units in meters
+        max_points (int): maximum number of vertices per polygon
+
+    Returns:
+        names of the "written" and "reused" cells
+    """
+    path = pathlib.Path(path)
+    settings = {"unit": unit, "precision": precision, "max_points": max_points}
+    manifest = _load_manifest(path, settings)
+    previous = manifest.get("cells", {})
+    hashes = cell_hashes(component)
+    cells = _dependencies(component)
+
+    dirty = [c for c in cells if previous.get(c.name, {}).get("hash") != hashes[c.name]]
+    header, serialized, footer = _split_cells(_serialize(dirty, **settings))
+    reused = [c.name for c in cells if c.name not in serialized]
+
+    entries = {}
+    offset = len(header)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as fout, contextlib.ExitStack() as stack:
+        fin = stack.enter_context(open(path, "rb")) if reused else None
+        fout.write(header)
+        for gds_cell in cells:
+            name = gds_cell.name
+            if name in serialized:
+                data = serialized[name]
+            else:
+                assert fin is not None
+                fin.seek(previous[name]["offset"])
+                data = fin.read(previous[name]["length"])
+            fout.write(data)
+            entries[name] = {
+                "hash": hashes[name],
+                "offset": offset,
+                "length": len(data),
+            }
+            offset += len(data)
+        fout.write(footer)
+    os.replace(tmp, path)
+
+    stat = path.stat()
+    manifest = {
+        "settings": settings,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "cells": entries,
+    }
+    manifest_path = path.with_name(path.name + MANIFEST_SUFFIX)
+    manifest_path.write_text(
+        json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8"
+    )
+    return {"written": [c.name for c in dirty], "reused": reused}
@@ -0,0 +1,121 @@
+"""
+Flat, fractured export of components for mask and e-beam writers.
+
+Each layer is flattened, merged and cut in square tiles processed by KLayout
+in parallel threads, then every tile is fractured into trapezoids or into
+convex figures with a maximum vertex count. Figures do not overlap, up to
+the rounding of slanted edges to the database unit, and their counts give an
+estimate of the write time::
+
+    from qutegds.fracture import fracture
+
+    result = fracture(cpw_with_ports(), "cpw_fractured.gds")
+    print(result.figures)
+
+.. module:: fracture.py
+"""
+
+import os
+import pathlib
+import tempfile
+from typing import NamedTuple, Optional
+
+import gdsfactory as gf
+import klayout.db as kdb
+from gdsfactory.typings import LayerSpec
+
+MODES = ("trapezoids", "vertices")
+
+
+class FractureResult(NamedTuple):
+    """Fractured file and its figure counts."""
+
+    path: pathlib.Path
+    """Written layout file."""
+    figures: dict[str, int]
+    """Number of figures of each "layer/datatype"."""
+    vertices: dict[str, int]
+    """Number of vertices of each "layer/datatype"."""
+
+    @property
+    def total(self) -> int:
+        """Number of figures of all layers."""
+        return sum(self.figures.values())
+
+
+def fracture(
+    component: gf.Component,
+    path: str | pathlib.Path,
+    mode: str = "trapezoids",
+    max_vertices: int = 8,
+    tile_size: float = 1000.0,
+    threads: Optional[int] = None,
+    layers: Optional[list[LayerSpec]] = None,
+) -> FractureResult:
+    """Write a flat layout of non overlapping trapezoids or small polygons.
+
+    Figures are cut at the tile boundaries as well, so that tiles are
+    fractured independently. Mask writers split the layout into fields
+    anyway, and a tile size that is a multiple of the field size adds no cuts.
+
+    Args:
+        component (gf.Component): component to fracture, its hierarchy is flattened
+        path (str | pathlib.Path): output file, ending in .gds, .gds.gz or .oas
+        mode (str): "trapezoids" with horizontal parallel sides, or convex
+            polygons with at most max_vertices "vertices"
+        max_vertices (int): maximum number of vertices of each figure in "vertices" mode
+        tile_size (float): side of the square tiles in um
+        threads (Optional[int]): number of threads, defaults to the CPU count
+        layers (Optional[list[LayerSpec]]): layers to write, defaults to every layer
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode={mode!r} not in {MODES}")
+    if max_vertices < 4:
+        raise ValueError(f"max_vertices={max_vertices} must be at least 4")
+
+    layout = kdb.Layout()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gdspath = pathlib.Path(tmpdir) / "fracture.gds"
+        layout.read(str(component.write_gds(gdspath, logging=False)))
+    top = layout.top_cell()
+    if layers is None:
+        layers = [(info.layer, info.datatype) for info in layout.layer_infos()]
+    layers = sorted({gf.get_layer(layer) for layer in layers})
+
+    output = kdb.Layout()
+    output.dbu = layout.dbu
+    output_top = output.create_cell(top.name)
+
+    processor = kdb.TilingProcessor()
+    processor.dbu = layout.dbu
+    processor.tile_size(tile_size, tile_size)
+    processor.threads = threads or os.cpu_count() or 1
+    processor.var("max_vertices", max_vertices)
+    if mode == "trapezoids":
+        processor.var("mode", kdb.Polygon.TD_htrapezoids)
+        fracture_ = "var figures = region.decompose_trapezoids_to_region(mode)"
+    else:
+        processor.var("mode", kdb.Polygon.TD_simple)
+        fracture_ = (
+            "var figures = region.decompose_convex_to_region(mode); "
+            "figures.break(max_vertices, 0)"
+        )
+    for n, layer in enumerate(layers):
+        processor.input(f"l{n}", layout, top.cell_index(), layout.layer(*layer))
+        processor.output(f"o{n}", output, output_top.cell_index(), output.layer(*layer))
+        # there is no _tile when the layout fits in a single tile
+        processor.queue(
+            f"var region = (_tile ? l{n} & _tile : l{n}).merged; "
+            f"{fracture_}; _output(o{n}, figures)"
+        )
+    processor.execute("fracture")
+
+    path = pathlib.Path(path)
+    output.write(str(path))
+    figures, vertices = {}, {}
+    for layer in layers:
+        key = f"{layer[0]}/{layer[1]}"
+        shapes = output_top.shapes(output.layer(*layer))
+        figures[key] = shapes.size()
+        vertices[key] = sum(shape.polygon.num_points() for shape in shapes.each())
+    return FractureResult(path=path, figures=figures, vertices=vertices)
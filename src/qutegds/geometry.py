@@ -1,7 +1,430 @@
 """Geometry related functions."""
 
-from functools import partial
+import contextlib
+import hashlib
+import os
+import pathlib
+import tempfile
+from collections.abc import Iterator
 
 import gdsfactory as gf
+import gdstk
+import klayout.db as kdb
+import numpy as np
+from gdsfactory import ComponentReference
+from gdsfactory.typings import LayerSpec
 
-subtract = partial(gf.geometry.boolean, operation="not")
+from qutegds import tracing
+
+DBU = 1e-3
+"""Database unit (um) of the KLayout operations."""
+OUTER_LAYER = (1000, 0)
+"""Internal layer of the shapes to subtract from while booleans are deferred."""
+INNER_LAYER = (1001, 0)
+"""Internal layer of the shapes to subtract while booleans are deferred."""
+
+_deferred = False
+
+
+def booleans_deferred() -> bool:
+    """Return whether ``subtract`` currently defers the booleans."""
+    return _deferred
+
+
+@contextlib.contextmanager
+def defer_booleans() -> Iterator[None]:
+    """Make ``subtract`` record its inputs instead of computing the difference.
+
+    Within the block, ``subtract(A, B)`` draws the shapes of A on
+    ``OUTER_LAYER`` and those of B on ``INNER_LAYER``. The differences of a
+    whole chip are then computed at once by ``resolve_booleans``, or by a
+    ``subtract`` whose inputs hold recorded shapes, e.g. the negative of
+    ``centered_chip``::
+
+        with defer_booleans():
+            chip = resolve_booleans(resonator_array(...))
+    """
+    global _deferred  # pylint: disable=global-statement
+    previous = _deferred
+    _deferred = True
+    try:
+        yield
+    finally:
+        _deferred = previous
+
+
+def _items(item) -> list:
+    return list(item) if isinstance(item, list | tuple) else [item]
+
+
+def _has_deferred(item) -> bool:
+    for element in _items(item):
+        component = (
+            element.parent if isinstance(element, ComponentReference) else element
+        )
+        if {OUTER_LAYER, INNER_LAYER} & set(component.get_layers()):
+            return True
+    return False
+
+
+@gf.cell
+def _subtract_recorded(A, B) -> gf.Component:
+    """Return A on OUTER_LAYER and B, clipped to the bounding box of A, on INNER_LAYER."""
+    c = gf.Component()
+    for element in _items(A):
+        for polygon in element.get_polygons():
+            c.add_polygon(polygon, layer=OUTER_LAYER)
+    # clipping keeps the bounding box of the difference, used for alignment
+    (xmin, ymin), (xmax, ymax) = c.bbox
+    inner = kdb.Region()
+    for element in _items(B):
+        for polygon in element.get_polygons():
+            inner.insert(kdb.DPolygon([kdb.DPoint(*p) for p in polygon]).to_itype(DBU))
+    inner &= kdb.Region(kdb.DBox(xmin, ymin, xmax, ymax).to_itype(DBU))
+    for polygon in inner.each():
+        c.add_polygon(
+            [(p.x * DBU, p.y * DBU) for p in polygon.to_simple_polygon().each_point()],
+            layer=INNER_LAYER,
+        )
+    return c
+
+
+def subtract(A, B, **kwargs) -> gf.Component:
+    """Return the boolean difference A - B.
+
+    While booleans are deferred, see ``defer_booleans``, the inputs are
+    recorded instead. Inputs already holding recorded shapes are resolved
+    together with the difference in a single KLayout operation.
+
+    Args:
+        A: Component, reference or tuple of them to subtract from
+        B: Component, reference or tuple of them to subtract
+        kwargs: keyword arguments for ``gf.geometry.boolean``
+    """
+    if _deferred:
+        if _has_deferred(A) or _has_deferred(B):
+            return _subtract_resolved(A, B, **kwargs)
+        return _subtract_recorded(A, B)
+    tracer = tracing.get_tracer()
+    if tracer is None:
+        return gf.geometry.boolean(A, B, operation="not", **kwargs)
+    with tracer.span("subtract", "boolean") as span:
+        span["polygons_a"], span["vertices_a"] = tracing.count_polygons(A)
+        span["polygons_b"], span["vertices_b"] = tracing.count_polygons(B)
+        component = gf.geometry.boolean(A, B, operation="not", **kwargs)
+        span["polygons"], span["vertices"] = tracing.count_polygons(component)
+    return component
+
+
+def _shape_input(
+    item: gf.Component | ComponentReference, gdspath: pathlib.Path
+) -> tuple[kdb.Layout, kdb.RecursiveShapeIterator, kdb.ICplxTrans]:
+    """Return KLayout layout, shapes of all its layers and placement of item."""
+    component = item.parent if isinstance(item, ComponentReference) else item
+    layout = kdb.Layout()
+    layout.read(str(component.write_gds(gdspath, logging=False)))
+    shapes = kdb.RecursiveShapeIterator(
+        layout, layout.top_cell(), list(layout.layer_indexes())
+    )
+    if not isinstance(item, ComponentReference):
+        return layout, shapes, kdb.ICplxTrans()
+    x, y = (round(float(v) / layout.dbu) for v in item.origin)
+    trans = kdb.ICplxTrans(
+        item.magnification or 1, item.rotation or 0, bool(item.x_reflection), x, y
+    )
+    return layout, shapes, trans
+
+
+@gf.cell
+def subtract_tiled(
+    A: gf.Component | ComponentReference,
+    B: gf.Component | ComponentReference,
+    tile_size: float = 1000.0,
+    threads: int | None = None,
+    layer: LayerSpec = (1, 0),
+) -> gf.Component:
+    """Return the boolean difference A - B, computed by KLayout tile by tile.
+
+    Shapes of A and B are streamed into each tile from their hierarchy, so
+    memory is bounded by the tile content rather than by the whole layout.
+    Results are clipped at the tile boundaries on the database grid, then
+    only the polygons cut by a tile boundary are merged back, so that the
+    result has the same polygons as an untiled difference.
+
+    Args:
+        A: Component or reference to subtract from, all layers merged
+        B: Component or reference to subtract, all layers merged
+        tile_size (float): side of the square tiles in um
+        threads (int | None): number of threads, defaults to the CPU count
+        layer (LayerSpec): layer of the result
+    """
+    processor = kdb.TilingProcessor()
+    result = kdb.Layout()
+    top = result.create_cell("subtract_tiled")
+    index = result.layer(*gf.get_layer(layer))
+    (xmin, ymin), (xmax, ymax) = np.asarray(A.bbox, dtype=float)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = pathlib.Path(tmpdir)
+        # layouts must outlive the processor execution
+        inputs = [
+            _shape_input(A, dirpath / "a.gds"),
+            _shape_input(B, dirpath / "b.gds"),
+        ]
+        for name, (_, shapes, trans) in zip("ab", inputs):
+            processor.input(name, shapes, trans)
+        result.dbu = inputs[0][0].dbu
+        processor.dbu = result.dbu
+        processor.output("o", result, top.cell_index(), index)
+        processor.tile_origin(xmin, ymin)
+        processor.tile_size(tile_size, tile_size)
+        processor.threads = threads or os.cpu_count() or 1
+        processor.queue("_output(o, a - b)")
+        processor.execute("subtract_tiled")
+
+    seams = kdb.Edges()
+    for x in np.arange(xmin + tile_size, xmax, tile_size):
+        seams.insert(kdb.DEdge(x, ymin, x, ymax).to_itype(result.dbu))
+    for y in np.arange(ymin + tile_size, ymax, tile_size):
+        seams.insert(kdb.DEdge(xmin, y, xmax, y).to_itype(result.dbu))
+    region = kdb.Region(top.shapes(index))
+    cut = region.interacting(seams)
+    top.shapes(index).clear()
+    top.shapes(index).insert(region.not_interacting(seams))
+    top.shapes(index).insert(cut.merged())
+    del region, cut
+    return _layout_to_component(result)
+
+
+def _layout_to_component(layout: kdb.Layout) -> gf.Component:
+    """Return component with the polygons of the top cell of a flat layout.
+
+    The layout is cleared once written, so that the polygons are never held
+    by KLayout and gdstk at the same time.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gdspath = pathlib.Path(tmpdir) / "result.gds"
+        layout.write(str(gdspath))
+        layout.clear()
+        library = gdstk.read_gds(str(gdspath))
+    c = gf.Component()
+    top = library.top_level()[0]
+    assert isinstance(top, gdstk.Cell)  # read_gds never returns raw cells
+    c._cell.add(*top.polygons)  # pylint: disable=protected-access
+    return c
+
+
+def _layer_regions(
+    item, tmpdir: pathlib.Path, dss: kdb.DeepShapeStore
+) -> tuple[list[kdb.Layout], dict[tuple[int, int], kdb.Region]]:
+    """Return layouts to keep alive and flattened regions by layer of items."""
+    layouts: list[kdb.Layout] = []
+    regions: dict[tuple[int, int], kdb.Region] = {}
+    for n, element in enumerate(_items(item)):
+        layout, _, trans = _shape_input(element, tmpdir / f"{id(element)}_{n}.gds")
+        layouts.append(layout)
+        for index in layout.layer_indexes():
+            info = layout.get_info(index)
+            iterator = layout.top_cell().begin_shapes_rec(index)
+            region = kdb.Region(iterator, dss).transformed(trans)
+            key = (info.layer, info.datatype)
+            regions[key] = regions[key] + region if key in regions else region
+    return layouts, regions
+
+
+def _pop_resolved(regions: dict[tuple[int, int], kdb.Region]) -> kdb.Region:
+    """Return recorded differences, removing the internal layers from regions."""
+    outer = regions.pop(OUTER_LAYER, kdb.Region())
+    inner = regions.pop(INNER_LAYER, kdb.Region())
+    return outer - inner
+
+
+def _shape_store(threads: int | None) -> kdb.DeepShapeStore:
+    dss = kdb.DeepShapeStore()
+    dss.threads = threads or os.cpu_count() or 1
+    return dss
+
+
+@gf.cell
+def _subtract_resolved(
+    A, B, layer: LayerSpec = (1, 0), threads: int | None = None, **kwargs
+):
+    """Return A - B, resolving the differences recorded in A and B first."""
+    del kwargs  # other gf.geometry.boolean options do not apply to KLayout
+    dss = _shape_store(threads)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dirpath = pathlib.Path(tmpdir)
+        merged = []
+        # layouts must outlive the regions
+        layouts = []
+        for item in (A, B):
+            item_layouts, regions = _layer_regions(item, dirpath, dss)
+            layouts += item_layouts
+            region = _pop_resolved(regions)
+            for other in regions.values():
+                region += other
+            merged.append(region)
+        result = kdb.Layout()
+        result.dbu = layouts[0].dbu
+        top = result.create_cell("subtract")
+        (merged[0] - merged[1]).flatten().insert_into(
+            result, top.cell_index(), result.layer(*gf.get_layer(layer))
+        )
+    return _layout_to_component(result)
+
+
+@gf.cell
+def resolve_booleans(
+    component: gf.Component,
+    layer: LayerSpec = (1, 0),
+    threads: int | None = None,
+) -> gf.Component:
+    """Return flat component with the recorded differences computed at once.
+
+    Shapes recorded by ``subtract`` while booleans are deferred, on
+    ``OUTER_LAYER`` and ``INNER_LAYER``, are subtracted in a single KLayout
+    operation and merged with the shapes drawn on layer. Other layers are
+    flattened unchanged.
+
+    The result is the union of all A shapes minus the union of all B shapes.
+    It only matches the union of the eager differences if no B of one
+    ``subtract`` overlaps the A of another, e.g. a gap cutting a neighbouring
+    line.
+
+    Args:
+        component (gf.Component): component built while booleans were deferred
+        layer (LayerSpec): layer of the differences
+        threads (int | None): number of threads, defaults to the CPU count
+    """
+    layer = gf.get_layer(layer)
+    dss = _shape_store(threads)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        layouts, regions = _layer_regions(component, pathlib.Path(tmpdir), dss)
+        regions[layer] = _pop_resolved(regions) + regions.get(layer, kdb.Region())
+        result = kdb.Layout()
+        result.dbu = layouts[0].dbu
+        top = result.create_cell("resolve_booleans")
+        for key, region in regions.items():
+            region.merged().flatten().insert_into(
+                result, top.cell_index(), result.layer(*key)
+            )
+    c = _layout_to_component(result)
+    c.add_ports(component.ports)
+    return c
+
+
+def count_vertices(component: gf.Component) -> int:
+    """Return number of polygon vertices drawn by a component, references included."""
+    return sum(len(polygon) for polygon in component.get_polygons())
+
+
+def vertex_savings(component: gf.Component) -> dict[str, int]:
+    """Return vertices saved by each cell built with a maximum chord error.
+
+    Savings are relative to the angle resolution of each cell, and negative
+    where the angle resolution is coarser than the chord error requires.
+
+    Args:
+        component (gf.Component): top cell, its whole hierarchy is inspected.
+    """
+    cells = [component, *component.get_dependencies(recursive=True)]
+    return {
+        c.name: c.info["vertices_saved"] for c in cells if "vertices_saved" in c.info
+    }
+
+
+def geometry_hash(item: gf.Component | str | pathlib.Path) -> dict[str, str]:
+    """Return canonical hash of the flattened geometry of each layer.
+
+    Shapes of each layer are merged on the database grid before hashing, so
+    the hashes do not depend on the hierarchy, on the polygon order or on the
+    first vertex of each polygon, only on the covered area.
+
+    Args:
+        item (gf.Component | str | pathlib.Path): component or GDS/OASIS file
+    """
+    layout = kdb.Layout()
+    if isinstance(item, gf.Component):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            layout.read(
+                str(item.write_gds(pathlib.Path(tmpdir) / "c.gds", logging=False))
+            )
+    else:
+        layout.read(str(item))
+    top = layout.top_cell()
+    hashes = {}
+    for index in layout.layer_indexes():
+        region = kdb.Region(top.begin_shapes_rec(index)).merged()
+        if region.is_empty():
+            continue
+        digest = hashlib.sha256()
+        for polygon in sorted(polygon.to_s() for polygon in region.each()):
+            digest.update(polygon.encode())
+        info = layout.get_info(index)
+        hashes[f"{info.layer}/{info.datatype}"] = digest.hexdigest()
+    return dict(sorted(hashes.items()))
+
+
+def cell_hashes(component: gf.Component) -> dict[str, str]:
+    """Return hash of the content of each cell of a hierarchy.
+
+    The hash of a cell covers its polygons, paths and labels, and the name,
+    hash and placement of the cells it references, so that a change in a
+    cell changes the hashes of all its ancestors.
+
+    Args:
+        component (gf.Component): top cell of the hierarchy
+    """
+    hashes: dict[str, str] = {}
+
+    def cell_hash(gds_cell: gdstk.Cell) -> str:
+        if gds_cell.name in hashes:
+            return hashes[gds_cell.name]
+        digest = hashlib.sha256()
+        for polygon in gds_cell.get_polygons(depth=0):
+            digest.update(f"{polygon.layer}/{polygon.datatype}".encode())
+            digest.update(np.round(polygon.points, 6).tobytes())
+        for label in gds_cell.labels:
+            digest.update(repr((label.text, label.layer, label.texttype)).encode())
+            digest.update(np.round(label.origin, 6).tobytes())
+        for ref in gds_cell.references:
+            offsets = ref.repetition.get_offsets() if ref.repetition.size else ()
+            placement = (ref.rotation, ref.magnification, ref.x_reflection)
+            digest.update(f"{ref.cell.name}:{cell_hash(ref.cell)}:{placement}".encode())
+            digest.update(np.round([ref.origin, *offsets], 6).tobytes())
+        hashes[gds_cell.name] = digest.hexdigest()
+        return hashes[gds_cell.name]
+
+    cell_hash(component._cell)  # pylint: disable=protected-access
+    return hashes
+
+
+def scanline_spans(
+    edges: np.ndarray, ys: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return spans of polygons crossed by horizontal scanlines, even-odd rule.
+
+    Every edge is intersected with the scanlines between its end points at
+    once, so that the cost grows with the number of crossings only.
+
+    Args:
+        edges (np.ndarray): (n, 4) array of x1, y1, x2, y2 of the polygon edges,
+            holes included
+        ys (np.ndarray): sorted y of the scanlines
+
+    Returns:
+        scanline index, start and end x of each span, sorted by scanline and x
+    """
+    x1, y1, x2, y2 = np.asarray(edges, dtype=float).reshape(-1, 4).T
+    # half-open [low, high) ranges count vertices on a scanline once
+    first = np.searchsorted(ys, np.minimum(y1, y2), side="left")
+    last = np.searchsorted(ys, np.maximum(y1, y2), side="left")
+    counts = np.maximum(last - first, 0)
+    edge = np.repeat(np.arange(len(x1)), counts)
+    row = np.arange(counts.sum()) - np.repeat(
+        np.cumsum(counts) - counts - first, counts
+    )
+    y = ys[row]
+    x = x1[edge] + (y - y1[edge]) * (x2[edge] - x1[edge]) / (y2[edge] - y1[edge])
+    order = np.lexsort((x, row))
+    row, x = row[order], x[order]
+    return row[::2], x[::2], x[1::2]
@@ -0,0 +1,71 @@
+"""
+qute PDK definition.
+
+Importing this module registers every qutegds cell and activates the PDK, so
+that cells can be referenced by name through ``gf.get_component``.
+
+.. module:: pdk.py
+"""
+
+from collections.abc import Callable
+
+import gdsfactory as gf
+from gdsfactory import Component
+from gdsfactory.generic_tech import get_generic_pdk
+
+from qutegds.components.chip_layout import (
+    centered_chip,
+    chip_title,
+    squares_at_corner_chip,
+)
+from qutegds.components.cpw_base import (
+    cpw,
+    cpw_with_ports,
+    rf_port,
+    snake,
+    straight_taper,
+)
+from qutegds.components.ground_plane import flux_holes
+from qutegds.components.labels import glyph, label
+from qutegds.components.resonator import (
+    resonator,
+    resonator_array,
+    resonator_cpw,
+    termination_closed,
+    termination_open,
+)
+from qutegds.components.simple_strip import strip_with_pads, stripes_array
+from qutegds.components.wafer import wafer
+
+cells: dict[str, Callable[..., Component]] = {
+    "centered_chip": centered_chip,
+    "chip_title": chip_title,
+    "cpw": cpw,
+    "cpw_with_ports": cpw_with_ports,
+    "flux_holes": flux_holes,
+    "glyph": glyph,
+    "label": label,
+    "resonator": resonator,
+    "resonator_array": resonator_array,
+    "resonator_cpw": resonator_cpw,
+    "rf_port": rf_port,
+    "snake": snake,
+    "squares_at_corner_chip": squares_at_corner_chip,
+    "straight_taper": straight_taper,
+    "strip_with_pads": strip_with_pads,
+    "stripes_array": stripes_array,
+    "termination_closed": termination_closed,
+    "termination_open": termination_open,
+    "wafer": wafer,
+}
+
+generic_pdk = get_generic_pdk()
+qute_pdk = gf.Pdk(
+    name="qute",
+    cells=cells,
+    base_pdk=generic_pdk,
+    layers=generic_pdk.layers,
+    layer_views=generic_pdk.layer_views,
+    cross_sections=generic_pdk.cross_sections,
+)
+qute_pdk.activate()
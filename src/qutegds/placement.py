@@ -0,0 +1,113 @@
+"""
+Spatial index and clearance checks for placed references.
+
+.. module:: placement.py
+"""
+
+import math
+from collections import defaultdict
+from collections.abc import Hashable, Iterator
+from typing import Generic, Optional, TypeVar
+
+import klayout.db as kdb
+import numpy as np
+from gdsfactory import ComponentReference
+
+from qutegds.geometry import DBU
+
+Key = TypeVar("Key", bound=Hashable)
+
+
+class BoxIndex(Generic[Key]):
+    """Uniform grid index of axis aligned boxes.
+
+    Each box is stored in every grid cell it touches, so that a query only
+    looks at the boxes sharing a grid cell with it. With a cell size close to
+    the typical box size, inserting and querying n boxes takes O(n) on average.
+
+    Args:
+        cell_size (float): side of the square grid cells in um
+    """
+
+    def __init__(self, cell_size: float):
+        """Create an empty index with square grid cells of side cell_size."""
+        if cell_size <= 0:
+            raise ValueError(f"cell_size={cell_size} must be positive")
+        self.cell_size = cell_size
+        self.boxes: dict[Key, np.ndarray] = {}
+        self._grid: dict[tuple[int, int], list[Key]] = defaultdict(list)
+
+    def _cells(self, bbox: np.ndarray) -> Iterator[tuple[int, int]]:
+        (i0, j0), (i1, j1) = np.floor(np.asarray(bbox) / self.cell_size).astype(int)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield i, j
+
+    def insert(self, key: Key, bbox: np.ndarray) -> None:
+        """Add a box, given as [[xmin, ymin], [xmax, ymax]], under key."""
+        self.boxes[key] = np.asarray(bbox, dtype=float)
+        for cell in self._cells(bbox):
+            self._grid[cell].append(key)
+
+    def query(self, bbox: np.ndarray, clearance: float = 0) -> set[Key]:
+        """Return keys of the boxes closer than clearance to bbox.
+
+        Args:
+            bbox (np.ndarray): [[xmin, ymin], [xmax, ymax]] box to look up
+            clearance (float): minimum distance between boxes
+        """
+        grown = np.asarray(bbox, dtype=float) + [[-clearance], [clearance]]
+        found = set()
+        for cell in self._cells(grown):
+            for key in self._grid.get(cell, ()):
+                box = self.boxes[key]
+                if (grown[0] < box[1]).all() and (box[0] < grown[1]).all():
+                    found.add(key)
+        return found
+
+
+def _region(ref: ComponentReference) -> kdb.Region:
+    region = kdb.Region()
+    for polygon in ref.get_polygons():
+        region.insert(kdb.Polygon([kdb.Point(*p) for p in np.round(polygon / DBU)]))
+    return region.merged()
+
+
+def find_collisions(
+    refs: dict[Key, ComponentReference],
+    clearance: float = 0,
+    cell_size: Optional[float] = None,
+) -> list[tuple[Key, Key]]:
+    """Return pairs of references overlapping or closer than clearance.
+
+    Candidate pairs are found with a ``BoxIndex`` of the bounding boxes and
+    are then checked on the actual polygons with KLayout.
+
+    Args:
+        refs (dict[Key, ComponentReference]): references to check, by key
+        clearance (float): minimum distance between the polygons of two references
+        cell_size (Optional[float]): grid cell size, defaults to the median box size
+    """
+    if not refs:
+        return []
+    bboxes = {key: np.asarray(ref.bbox, dtype=float) for key, ref in refs.items()}
+    if cell_size is None:
+        sizes = [float((bbox[1] - bbox[0]).max()) for bbox in bboxes.values()]
+        cell_size = max(float(np.median(sizes)), clearance, 1.0)
+    index: BoxIndex[Key] = BoxIndex(cell_size)
+    regions: dict[Key, kdb.Region] = {}
+    order = {key: n for n, key in enumerate(refs)}
+    collisions = []
+    for key, bbox in bboxes.items():
+        for other in sorted(index.query(bbox, clearance), key=order.__getitem__):
+            for k in (key, other):
+                if k not in regions:
+                    regions[k] = _region(refs[k])
+            a, b = regions[other], regions[key]
+            distance = math.ceil(clearance / DBU)
+            if not (a & b).is_empty() or (
+                distance > 0 and not a.separation_check(b, distance).is_empty()
+            ):
+                collisions.append((other, key))
+        index.insert(key, bbox)
+    return collisions
@@ -0,0 +1,318 @@
+"""
+Fast raster previews of components, as NumPy images or PNG thumbnails.
+
+Polygons are filled by a vectorized scanline at the pixel centers. Each cell
+is rasterized once and then copied to every place it is referenced, so that
+arrays of repeated cells cost one copy per instance::
+
+    from qutegds.preview import to_png
+
+    to_png(centered_chip(), "chip.png", max_pixels=512, cache_dir=".previews")
+
+.. module:: preview.py
+"""
+
+import hashlib
+import pathlib
+import struct
+import zlib
+from typing import Optional
+
+import gdsfactory as gf
+import gdstk
+import numpy as np
+from gdsfactory import Component
+from gdsfactory.typings import LayerSpec
+
+from qutegds.geometry import cell_hashes
+
+COLORS = (
+    (31, 119, 180),
+    (255, 127, 14),
+    (44, 160, 44),
+    (214, 39, 40),
+    (148, 103, 189),
+    (140, 86, 75),
+    (227, 119, 194),
+    (127, 127, 127),
+)
+"""Colors of the layers, in increasing layer order."""
+ALPHA = 0.6
+"""Opacity of the layers drawn over each other."""
+
+PHASES = 16
+"""Sub-pixel positions told apart when placing referenced cells."""
+
+Raster = tuple[int, int, np.ndarray]
+"""Row and column of the first pixel, and boolean mask rows by columns."""
+Transform = tuple[int, bool]
+"""Quarter turns and x reflection, applied after the reflection."""
+
+
+def _fill(polygons: list[np.ndarray], i0: int, j0: int, shape, pixel: float):
+    """Return mask of the pixel centers covered by the union of polygons.
+
+    Polygons are oriented counterclockwise, then every edge adds its crossings
+    with the pixel rows to the winding numbers, which are positive inside.
+    """
+    rows, columns = shape
+    if not polygons or not rows or not columns:
+        return np.zeros(shape, dtype=bool)
+    starts, ends = [], []
+    for points in polygons:
+        x, y = points[:, 0], points[:, 1]
+        if np.dot(x, np.roll(y, -1)) < np.dot(y, np.roll(x, -1)):
+            points = points[::-1]
+        starts.append(points)
+        ends.append(np.roll(points, -1, axis=0))
+    (x0, y0), (x1, y1) = np.concatenate(starts).T, np.concatenate(ends).T
+    # pixel rows whose center lies in [min(y0, y1), max(y0, y1))
+    r0 = np.ceil(np.minimum(y0, y1) / pixel - 0.5).astype(int) - i0
+    r1 = np.ceil(np.maximum(y0, y1) / pixel - 0.5).astype(int) - i0
+    r0, r1 = np.clip(r0, 0, rows), np.clip(r1, 0, rows)
+    counts = r1 - r0
+    edge = np.repeat(np.arange(len(x0)), counts)
+    row = np.repeat(r0 - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    y = (row + i0 + 0.5) * pixel
+    x = x0[edge] + (y - y0[edge]) * (x1[edge] - x0[edge]) / (y1[edge] - y0[edge])
+    column = np.clip(np.ceil(x / pixel - 0.5).astype(int) - j0, 0, columns)
+    # edges going down are on the left of counterclockwise polygons
+    winding = np.where(y1[edge] < y0[edge], 1, -1)
+    diff = np.bincount(
+        row * (columns + 1) + column, weights=winding, minlength=rows * (columns + 1)
+    )
+    return diff.reshape(rows, columns + 1).cumsum(axis=1)[:, :columns] > 0
+
+
+def _apply(points: np.ndarray, transform: Transform) -> np.ndarray:
+    """Return points reflected across the x axis, then rotated by quarter turns."""
+    turns, x_reflection = transform
+    x, y = points[..., 0], points[..., 1]
+    if x_reflection:
+        y = -y
+    for _ in range(turns % 4):
+        x, y = -y, x
+    return np.stack([x, y], axis=-1)
+
+
+def _compose(outer: Transform, inner: Transform) -> Transform:
+    """Return transform applying inner, then outer."""
+    turns, x_reflection = outer
+    inner_turns, inner_reflection = inner
+    turns += -inner_turns if x_reflection else inner_turns
+    return turns % 4, x_reflection != inner_reflection
+
+
+def _blit(canvas: Raster, raster: Raster, shifts: np.ndarray) -> None:
+    """Draw raster on canvas at every (x, y) shift in pixels."""
+    c_i0, c_j0, target = canvas
+    i0, j0, mask = raster
+    rows, columns = np.nonzero(mask)
+    if not len(rows):
+        return
+    for chunk in np.array_split(shifts, max(1, len(shifts) * len(rows) // 2**22)):
+        i = (chunk[:, 1:] + i0 - c_i0 + rows).ravel()
+        j = (chunk[:, :1] + j0 - c_j0 + columns).ravel()
+        inside = (i >= 0) & (i < target.shape[0]) & (j >= 0) & (j < target.shape[1])
+        target[i[inside], j[inside]] = True
+
+
+def _bbox_pixels(bbox, pixel: float) -> tuple[int, int, tuple[int, int]]:
+    (xmin, ymin), (xmax, ymax) = bbox
+    i0, j0 = int(np.floor(ymin / pixel)), int(np.floor(xmin / pixel))
+    i1, j1 = int(np.ceil(ymax / pixel)), int(np.ceil(xmax / pixel))
+    return i0, j0, (i1 - i0, j1 - j0)
+
+
+def _rasterize_cell(
+    gds_cell: gdstk.Cell,
+    transform: Transform,
+    phase: tuple[int, int],
+    pixel: float,
+    layers: Optional[set],
+    rasters: dict[tuple, dict[tuple[int, int], Raster]],
+) -> dict[tuple[int, int], Raster]:
+    """Return raster of each layer of a transformed cell, placed at a sub-pixel phase.
+
+    The cell origin sits at phase / ``PHASES`` pixels from the pixel grid.
+    Referenced cells are rasterized once per transform and phase, then copied.
+    """
+    key = (gds_cell.name, transform, phase)
+    if key in rasters:
+        return rasters[key]
+    result: dict[tuple[int, int], Raster] = {}
+    rasters[key] = result
+    bbox = gds_cell.bounding_box()
+    if bbox is None:
+        return result
+    shift = np.array(phase) * pixel / PHASES
+    (xmin, ymin), (xmax, ymax) = bbox
+    corners = np.array([(xmin, ymin), (xmin, ymax), (xmax, ymin), (xmax, ymax)])
+    corners = _apply(corners, transform) + shift
+    i0, j0, shape = _bbox_pixels((corners.min(0), corners.max(0)), pixel)
+
+    polygons: dict[tuple[int, int], list[np.ndarray]] = {}
+
+    def add(polygon: gdstk.Polygon) -> None:
+        polygons.setdefault((polygon.layer, polygon.datatype), []).append(
+            _apply(np.asarray(polygon.points), transform) + shift
+        )
+
+    for polygon in gds_cell.get_polygons(depth=0):
+        add(polygon)
+    children = []
+    for ref in gds_cell.references:
+        turns = ref.rotation / (np.pi / 2)
+        if ref.magnification != 1 or abs(turns - round(turns)) > 1e-9:
+            # only reflections and right angles are rasterized once per cell
+            for polygon in ref.get_polygons():
+                add(polygon)
+            continue
+        child_transform = _compose(transform, (round(turns) % 4, ref.x_reflection))
+        offsets = ref.repetition.get_offsets() if ref.repetition.size else [(0, 0)]
+        origins = np.asarray(ref.origin) + np.reshape(offsets, (-1, 2))
+        steps = np.round((_apply(origins, transform) + shift) / pixel * PHASES)
+        steps = steps.astype(int)
+        codes = (steps % PHASES) @ (PHASES, 1)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for indexes in np.split(order, bounds):
+            phase_x, phase_y = steps[indexes[0]] % PHASES
+            child_phase = (int(phase_x), int(phase_y))
+            child = _rasterize_cell(
+                ref.cell, child_transform, child_phase, pixel, layers, rasters
+            )
+            children.append((child, steps[indexes] // PHASES))
+
+    keys = set(polygons).union(*(child for child, _ in children))
+    for layer in sorted(keys):
+        if layers is not None and layer not in layers:
+            continue
+        canvas = (i0, j0, _fill(polygons.get(layer, []), i0, j0, shape, pixel))
+        for child, shifts in children:
+            if layer in child:
+                _blit(canvas, child[layer], shifts)
+        result[layer] = canvas
+    return result
+
+
+def _pixel_size(component: Component, pixel_size, max_pixels: int) -> float:
+    if pixel_size is not None:
+        return pixel_size
+    (xmin, ymin), (xmax, ymax) = component.bbox
+    return max(xmax - xmin, ymax - ymin, 1e-3) / max_pixels
+
+
+def rasterize(
+    component: Component,
+    pixel_size: Optional[float] = None,
+    max_pixels: int = 1024,
+    layers: Optional[list[LayerSpec]] = None,
+) -> dict[tuple[int, int], np.ndarray]:
+    """Return boolean mask of each layer, with the first row at the top.
+
+    A pixel is set when its center is covered by a polygon, so that features
+    smaller than a pixel may not show up. Referenced cells are rasterized once
+    for each orientation and position within a pixel, to 1 / ``PHASES`` pixel.
+
+    Args:
+        component (Component): component to rasterize
+        pixel_size (Optional[float]): side of the square pixels in um, defaults
+            to fit the component in max_pixels
+        max_pixels (int): number of pixels of the longest side when pixel_size is None
+        layers (Optional[list[LayerSpec]]): layers to rasterize, defaults to every layer
+    """
+    pixel = _pixel_size(component, pixel_size, max_pixels)
+    selected = None if layers is None else {gf.get_layer(layer) for layer in layers}
+    # pylint: disable=protected-access
+    rasters = _rasterize_cell(component._cell, (0, False), (0, 0), pixel, selected, {})
+    return {layer: mask[::-1] for layer, (_, _, mask) in rasters.items()}
+
+
+def to_image(
+    component: Component,
+    pixel_size: Optional[float] = None,
+    max_pixels: int = 1024,
+    layers: Optional[list[LayerSpec]] = None,
+) -> np.ndarray:
+    """Return RGB image of the layers drawn over a white background.
+
+    Args:
+        component (Component): component to draw
+        pixel_size (Optional[float]): side of the square pixels in um, defaults
+            to fit the component in max_pixels
+        max_pixels (int): number of pixels of the longest side when pixel_size is None
+        layers (Optional[list[LayerSpec]]): layers to draw, defaults to every layer
+    """
+    masks = rasterize(component, pixel_size, max_pixels, layers)
+    pixel = _pixel_size(component, pixel_size, max_pixels)
+    image = np.full((*_bbox_pixels(component.bbox, pixel)[2], 3), 255.0)
+    for n, (_, mask) in enumerate(sorted(masks.items())):
+        color = np.array(COLORS[n % len(COLORS)])
+        image[mask] = (1 - ALPHA) * image[mask] + ALPHA * color
+    return image.round().astype(np.uint8)
+
+
+def _png(image: np.ndarray) -> bytes:
+    """Return PNG bytes of an RGB image."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        payload = kind + data
+        return (
+            struct.pack(">I", len(data))
+            + payload
+            + struct.pack(">I", zlib.crc32(payload))
+        )
+
+    height, width, _ = image.shape
+    # every row starts with filter type 0
+    rows = np.concatenate(
+        [np.zeros((height, 1), np.uint8), image.reshape(height, -1)], 1
+    )
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def to_png(
+    component: Component,
+    path: Optional[str | pathlib.Path] = None,
+    pixel_size: Optional[float] = None,
+    max_pixels: int = 1024,
+    layers: Optional[list[LayerSpec]] = None,
+    cache_dir: Optional[str | pathlib.Path] = None,
+) -> bytes:
+    """Return PNG bytes of a component image, written to path if given.
+
+    Args:
+        component (Component): component to draw
+        path (Optional[str | pathlib.Path]): PNG file to write
+        pixel_size (Optional[float]): side of the square pixels in um, defaults
+            to fit the component in max_pixels
+        max_pixels (int): number of pixels of the longest side when pixel_size is None
+        layers (Optional[list[LayerSpec]]): layers to draw, defaults to every layer
+        cache_dir (Optional[str | pathlib.Path]): directory of PNG files stored
+            by content hash of the component and drawing options
+    """
+    cached = None
+    if cache_dir is not None:
+        content = cell_hashes(component)[component.name]
+        key = repr((content, pixel_size, max_pixels, layers))
+        cached = (
+            pathlib.Path(cache_dir) / f"{hashlib.sha256(key.encode()).hexdigest()}.png"
+        )
+    if cached is not None and cached.exists():
+        data = cached.read_bytes()
+    else:
+        data = _png(to_image(component, pixel_size, max_pixels, layers))
+        if cached is not None:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cached.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            tmp.replace(cached)
+    if path is not None:
+        pathlib.Path(path).write_bytes(data)
+    return data
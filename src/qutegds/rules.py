@@ -0,0 +1,22 @@
+"""
+Design rules of the layers, checked by ``qutegds.drc.drc``.
+
+.. module:: rules.py
+"""
+
+from typing import NamedTuple
+
+from gdsfactory.typings import LayerSpec
+
+
+class Rule(NamedTuple):
+    """Minimum width or space of the shapes of a layer."""
+
+    name: str
+    """Name of the rule, used as key of the results."""
+    layer: LayerSpec
+    """Layer checked by the rule."""
+    kind: str
+    """Either "width" of the shapes or "space" between them."""
+    value: float
+    """Minimum width or space (um)."""
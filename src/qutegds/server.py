@@ -0,0 +1,236 @@
+"""
+Local build server keeping the PDK and the cell caches warm across requests.
+
+Cells are built by a pool of worker processes which activate the PDK once and
+keep their cell caches between requests. Requests are plain HTTP, over TCP or
+a Unix socket::
+
+    qutegds serve --port 8765 --jobs 4
+
+    curl -X POST localhost:8765/build -d '{"cell": "resonator_cpw", "settings": {"length": 4000}}'
+
+``POST /build`` answers a JSON object with the cell ``name``, its ``key``,
+``info``, ``settings`` and ``ports``, and the base64 encoded ``gds`` bytes.
+``GET /cells`` lists the registered cells. Concurrent requests for the same
+cell and settings share a single build.
+
+.. module:: server.py
+"""
+
+import asyncio
+import base64
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from typing import Optional
+
+MAX_BODY = 2**20
+"""Largest accepted request body in bytes."""
+START_ROUNDS = 100
+"""Rounds of tasks sent to the workers on start, until each one has run a task."""
+
+
+def _init_worker(cache_dir: Optional[str], max_entries: Optional[int]) -> None:
+    """Activate the PDK and the caches of a worker process."""
+    # pylint: disable=import-outside-toplevel
+    from qutegds import cache
+    from qutegds.pdk import qute_pdk
+
+    qute_pdk.activate()
+    if cache_dir is not None:
+        cache.enable_disk_cache(cache_dir)
+    if max_entries is not None:
+        cache.enable_memory_cache(max_entries=max_entries)
+
+
+def _pid(wait: float) -> int:
+    """Return id of the worker process, holding it for wait seconds."""
+    time.sleep(wait)
+    return os.getpid()
+
+
+def _build(cell: str, settings: dict) -> tuple[bytes, dict]:
+    """Build a cell in a worker process, returning its GDS bytes and metadata."""
+    # pylint: disable=import-outside-toplevel
+    import gdsfactory as gf
+
+    from qutegds.cache import serialize_component
+
+    component = gf.get_component({"component": cell, "settings": settings})
+    return serialize_component(component)
+
+
+class BuildServer:
+    """Asyncio HTTP server building registered cells in warm worker processes.
+
+    The server process imports ``qutegds.pdk`` too, which activates the PDK
+    there, to check the requested cells and hash their settings. It never
+    builds cells itself.
+
+    Args:
+        max_workers (Optional[int]): worker processes, defaults to the CPU count
+        cache_dir (Optional[str | pathlib.Path]): disk cache shared by the workers
+        max_entries (Optional[int]): bound of the in-memory cell cache of each worker
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str | pathlib.Path] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """Create the worker pool, its processes are started by ``start``."""
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(None if cache_dir is None else str(cache_dir), max_entries),
+        )
+        self.builds = 0
+        self.merged = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def build(self, cell: str, settings: dict) -> dict:
+        """Return built cell, sharing the build with identical pending requests.
+
+        Args:
+            cell (str): name of the registered cell
+            settings (dict): keyword arguments of the cell
+        """
+        # pylint: disable=import-outside-toplevel
+        from qutegds.cache import canonical_kwargs, cell_key
+        from qutegds.pdk import cells
+
+        if cell not in cells:
+            raise ValueError(f"{cell!r} is not a registered cell")
+        try:
+            key = cell_key(cell, canonical_kwargs(cells[cell], **settings))
+        except TypeError as error:
+            raise ValueError(f"{cell}: {error}") from error
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.merged += 1
+        else:
+            self.builds += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, _build, cell, settings)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        data, metadata = await asyncio.shield(future)
+        return {
+            "key": key,
+            "name": metadata["name"],
+            "info": metadata.get("info", {}),
+            "settings": metadata.get("settings", {}),
+            "ports": metadata.get("ports", {}),
+            "gds": base64.b64encode(data).decode(),
+        }
+
+    async def _respond(self, method: str, target: str, body: bytes) -> tuple:
+        # pylint: disable=import-outside-toplevel
+        from qutegds.pdk import cells
+
+        if method == "GET" and target == "/cells":
+            return HTTPStatus.OK, {"cells": sorted(cells)}
+        if method == "GET" and target == "/health":
+            return HTTPStatus.OK, {"builds": self.builds, "merged": self.merged}
+        if method == "POST" and target == "/build":
+            try:
+                request = json.loads(body)
+                result = await self.build(request["cell"], request.get("settings", {}))
+            except (ValueError, KeyError, TypeError) as error:
+                return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(error)}
+            return HTTPStatus.OK, result
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {target}"}
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer a single HTTP request of a connection."""
+        try:
+            method, target, _ = (await reader.readline()).decode().split(" ", 2)
+            headers = {}
+            while (line := (await reader.readline()).decode().strip()) != "":
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {}
+            else:
+                body = await reader.readexactly(length)
+                status, payload = await self._respond(method, target, body)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = HTTPStatus.BAD_REQUEST, {"error": "malformed request"}
+        content = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            "Connection: close\r\n\r\n".encode() + content
+        )
+        await writer.drain()
+        writer.close()
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        unix: Optional[str | pathlib.Path] = None,
+    ) -> asyncio.AbstractServer:
+        """Start every worker, then listen on a TCP port, or on a Unix socket if given."""
+        loop = asyncio.get_running_loop()
+        pids: set[int] = set()
+        for _ in range(START_ROUNDS):
+            pids.update(
+                await asyncio.gather(
+                    *(
+                        loop.run_in_executor(self.pool, _pid, 0.01)
+                        for _ in range(self.max_workers)
+                    )
+                )
+            )
+            if len(pids) == self.max_workers:
+                break
+        else:
+            raise RuntimeError(
+                f"Only {len(pids)} of {self.max_workers} worker processes started"
+            )
+        if unix is not None:
+            return await asyncio.start_unix_server(self.handle, path=os.fspath(unix))
+        return await asyncio.start_server(self.handle, host=host, port=port)
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    unix: Optional[str | pathlib.Path] = None,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str | pathlib.Path] = None,
+    max_entries: Optional[int] = None,
+) -> None:
+    """Run a build server until cancelled.
+
+    Args:
+        host (str): address to listen on
+        port (int): TCP port to listen on
+        unix (Optional[str | pathlib.Path]): Unix socket to listen on instead of TCP
+        max_workers (Optional[int]): worker processes, defaults to the CPU count
+        cache_dir (Optional[str | pathlib.Path]): disk cache shared by the workers
+        max_entries (Optional[int]): bound of the in-memory cell cache of each worker
+    """
+    server = BuildServer(max_workers, cache_dir=cache_dir, max_entries=max_entries)
+    try:
+        async with await server.start(host, port, unix) as listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
@@ -0,0 +1,167 @@
+"""
+Opt-in tracing of qutegds cell builds and booleans.
+
+While a :class:`Tracer` is active, every qutegds cell and every
+``geometry.subtract`` call records a nested span with its wall time and
+layout statistics. Spans can be exported as a Chrome trace-event file (to be
+opened in ``chrome://tracing`` or Perfetto) or summarized in a flat table::
+
+    from qutegds import tracing
+
+    with tracing.trace() as tracer:
+        resonator_array(...)
+    tracer.write_chrome_trace("build.json")
+    print(tracer.table())
+
+.. module:: tracing.py
+"""
+
+import contextlib
+import json
+import os
+import pathlib
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+
+
+class Tracer:
+    """Collector of nested build spans."""
+
+    def __init__(self) -> None:
+        """Start an empty trace, timed from now."""
+        self.events: list[dict] = []
+        self._local = threading.local()
+        self._start = time.perf_counter()
+
+    def _stack(self) -> list[dict]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "cell") -> Iterator[dict]:
+        """Record the enclosed block, yielding a dict of arguments to fill.
+
+        Args:
+            name (str): name of the span, e.g. the cell function
+            category (str): span category, e.g. "cell" or "boolean"
+        """
+        stack = self._stack()
+        args: dict = {}
+        event = {
+            "name": name,
+            "cat": category,
+            "args": args,
+            "children": 0.0,
+            "depth": len(stack),
+            "tid": threading.get_ident(),
+        }
+        stack.append(event)
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1]["children"] += duration
+            event["start"] = start - self._start
+            event["duration"] = duration
+            self.events.append(event)
+
+    def chrome_trace(self) -> dict:
+        """Return the spans in Chrome trace-event format."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": event["name"],
+                    "cat": event["cat"],
+                    "ph": "X",
+                    "ts": event["start"] * 1e6,
+                    "dur": event["duration"] * 1e6,
+                    "pid": pid,
+                    "tid": event["tid"],
+                    "args": event["args"],
+                }
+                for event in sorted(self.events, key=lambda e: e["start"])
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write_chrome_trace(self, path: str | pathlib.Path) -> pathlib.Path:
+        """Write the spans as a Chrome trace-event JSON file and return its path."""
+        path = pathlib.Path(path)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+        return path
+
+    def summary(self) -> dict[str, dict]:
+        """Return per-name totals of calls, cache hits, times and vertices."""
+        rows: dict[str, dict] = defaultdict(
+            lambda: {
+                "calls": 0,
+                "hits": 0,
+                "total_s": 0.0,
+                "self_s": 0.0,
+                "vertices": 0,
+            }
+        )
+        for event in self.events:
+            row = rows[event["name"]]
+            row["calls"] += 1
+            row["hits"] += int(event["args"].get("cache_hit", False))
+            row["total_s"] += event["duration"]
+            row["self_s"] += event["duration"] - event["children"]
+            row["vertices"] += event["args"].get("vertices", 0)
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["self_s"]))
+
+    def table(self) -> str:
+        """Return the summary formatted as a text table, slowest first."""
+        lines = [
+            f"{'name':30s} {'calls':>6s} {'hits':>6s} {'total ms':>10s} "
+            f"{'self ms':>10s} {'vertices':>10s}"
+        ]
+        for name, row in self.summary().items():
+            lines.append(
+                f"{name:30s} {row['calls']:6d} {row['hits']:6d} "
+                f"{row['total_s'] * 1e3:10.2f} {row['self_s'] * 1e3:10.2f} "
+                f"{row['vertices']:10d}"
+            )
+        return "\n".join(lines)
+
+
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer | None:
+    """Return the active tracer, if any."""
+    return _tracer
+
+
+@contextlib.contextmanager
+def trace(tracer: Tracer | None = None) -> Iterator[Tracer]:
+    """Activate a tracer for the enclosed block.
+
+    Args:
+        tracer (Tracer | None): tracer to activate, a new one by default
+    """
+    global _tracer  # pylint: disable=global-statement
+    previous = _tracer
+    _tracer = tracer or Tracer()
+    try:
+        yield _tracer
+    finally:
+        _tracer = previous
+
+
+def count_polygons(*components) -> tuple[int, int]:
+    """Return number of polygons and vertices of components or references."""
+    polygons = [
+        polygon
+        for component in components
+        for item in (component if isinstance(component, list | tuple) else [component])
+        for polygon in item.get_polygons()
+    ]
+    return len(polygons), sum(len(polygon) for polygon in polygons)
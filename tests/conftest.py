@@ -0,0 +1,30 @@
+"""Shared test fixtures."""
+
+import klayout.db as kdb
+import pytest
+
+
+def _xor_is_empty(gdspath1, gdspath2) -> bool:
+    layouts = [kdb.Layout(), kdb.Layout()]
+    for layout, gdspath in zip(layouts, (gdspath1, gdspath2)):
+        layout.read(str(gdspath))
+    for layer in {
+        layout.get_info(i).to_s() for layout in layouts for i in layout.layer_indexes()
+    }:
+        regions = [
+            kdb.Region(
+                layout.top_cell().begin_shapes_rec(
+                    layout.layer(kdb.LayerInfo.from_string(layer))
+                )
+            )
+            for layout in layouts
+        ]
+        if not (regions[0] ^ regions[1]).is_empty():
+            return False
+    return True
+
+
+@pytest.fixture
+def xor_is_empty():
+    """Return whether two GDS files have the same flattened polygons on every layer."""
+    return _xor_is_empty
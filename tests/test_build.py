@@ -0,0 +1,56 @@
+"""Tests for the sweep build command."""
+
+import json
+
+import pytest
+
+from qutegds.build import MANIFEST, load_spec, variants
+from qutegds.cli import main
+
+SPEC = """
+cells:
+  - cell: cpw
+    settings: {gap: 4}
+    sweep:
+      width: [5, 10]
+      length: [100, 200]
+  - cell: stripes_array
+    sweep:
+      widths: [[1, 2], 5]
+"""
+
+
+def test_variants():
+    """Every combination of swept values is a variant with its own hash."""
+    spec = {"cells": [{"cell": "cpw", "sweep": {"width": [5, 10], "gap": [2, 3]}}]}
+    result = variants(spec)
+    assert len({variant.key for variant in result}) == 4
+    with pytest.raises(ValueError):
+        variants({"cells": [{"cell": "not_a_cell"}]})
+
+
+def test_build_incremental(tmp_path, capsys):
+    """Unchanged variants are skipped on the next build."""
+    spec = tmp_path / "sweep.yml"
+    spec.write_text(SPEC)
+    output = tmp_path / "build"
+    main(["build", str(spec), "-o", str(output), "-j", "2"])
+    assert "6 built, 0 up to date" in capsys.readouterr().out
+    manifest = json.loads((output / MANIFEST).read_text())
+    assert len(manifest) == 6
+    assert all((output / filename).exists() for filename in manifest)
+
+    spec.write_text(SPEC.replace("[100, 200]", "[100, 300]"))
+    main(["build", str(spec), "-o", str(output)])
+    assert "2 built, 4 up to date, 2 removed" in capsys.readouterr().out
+    manifest = json.loads((output / MANIFEST).read_text())
+    assert len(manifest) == 6
+    assert sorted(path.name for path in output.glob("*.gds")) == sorted(manifest)
+
+
+def test_load_spec_not_a_mapping(tmp_path):
+    """A spec which is not a mapping is reported with its file name."""
+    spec = tmp_path / "sweep.yml"
+    spec.write_text("- cell: cpw\n")
+    with pytest.raises(ValueError, match="sweep.yml"):
+        load_spec(spec)
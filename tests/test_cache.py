@@ -0,0 +1,206 @@
+"""Tests for the persistent on-disk cell cache."""
+
+import functools
+import subprocess
+import sys
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+from gdsfactory.cell import CACHE
+
+import qutegds.cell
+from qutegds import cache, cpw_with_ports, resonator_cpw, rf_port, termination_open
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    gf.clear_cache()
+    yield cache.enable_disk_cache(tmp_path)
+    cache.disable_disk_cache()
+    gf.clear_cache()
+
+
+@pytest.mark.parametrize(
+    "factory,kwargs",
+    [(cpw_with_ports, {"length": 500}), (resonator_cpw, {"length": 700})],
+)
+def test_disk_cache_roundtrip(disk_cache, factory, kwargs):
+    """A hit in a fresh cell cache reproduces geometry, info and ports."""
+    built = factory(**kwargs)
+    polygons = built.get_polygons(by_spec=True, as_array=True)
+    info, ports = built.info.model_dump(), built.ports
+    gf.clear_cache()
+
+    hits = disk_cache.hits
+    loaded = factory(**kwargs)
+    assert disk_cache.hits == hits + 1
+    assert loaded is not built
+    assert loaded.name == built.name
+    assert loaded.info.model_dump() == info
+    assert set(loaded.ports) == set(ports)
+    for name, port in ports.items():
+        assert loaded.ports[name].center == pytest.approx(port.center)
+    loaded_polygons = loaded.get_polygons(by_spec=True, as_array=True)
+    for layer, polys in polygons.items():
+        assert sum(len(p) for p in loaded_polygons[layer]) == sum(len(p) for p in polys)
+    assert factory(**kwargs) is loaded
+
+
+def test_disk_cache_miss_after_hit(disk_cache):
+    """Children loaded by a hit keep their ports for the builds reusing them."""
+    resonator_cpw(length=500)
+    gf.clear_cache()
+    resonator_cpw(length=500)
+    assert disk_cache.hits == 1
+    misses = disk_cache.misses
+    termination = gf.get_component("termination_open", width=6.0, gap=3.0)
+    assert set(termination.ports) == {"o1"}
+    built = resonator_cpw(length=650)
+    assert disk_cache.misses > misses
+    assert set(built.ports) == {"o1", "o2"}
+
+
+def test_disk_cache_eviction(disk_cache):
+    """Entries beyond max_size are evicted, least recently used first."""
+    keys = []
+    for length in (100, 200, 300):
+        key = cache.cell_key("cpw", {"length": length})
+        disk_cache.put(key, gf.components.straight(length=length))
+        keys.append(key)
+    # a disk hit, not a cell found in the gdsfactory cache, refreshes an entry
+    gf.clear_cache()
+    disk_cache.get(keys[0])
+    disk_cache.max_size = disk_cache.size() - 1
+    disk_cache.evict()
+    assert disk_cache.get(keys[1]) is None
+    assert disk_cache.get(keys[0]) is not None
+    assert disk_cache.size() <= disk_cache.max_size
+
+
+def test_disk_cache_warm_calls(disk_cache, monkeypatch):
+    """Cells already in the gdsfactory cache never read the disk cache."""
+    resonator_cpw(length=800)
+    gf.clear_cache()
+    loaded = resonator_cpw(length=800)
+    termination = gf.get_component("termination_open", width=6.0, gap=3.0)
+
+    def no_disk(key):
+        raise AssertionError(f"disk cache read for {key}")
+
+    monkeypatch.setattr(disk_cache, "_paths", no_disk)
+    assert resonator_cpw(length=800) is loaded
+    # the loaded children are found by name before their canonical key
+    monkeypatch.setattr(qutegds.cell, "_names", {})
+    assert termination_open(width=6.0, gap=3.0) is termination
+
+
+def test_cell_key_is_canonical():
+    """Keys do not depend on argument order or on passing defaults."""
+    a = cache.canonical_kwargs(resonator_cpw, width=6.0, gap=3.0, length=500)
+    b = cache.canonical_kwargs(resonator_cpw, length=500, gap=3.0)
+    assert cache.cell_key("resonator_cpw", a) == cache.cell_key("resonator_cpw", b)
+
+
+def test_canonical():
+    """Canonical forms flatten partials, snap floats and sort dicts."""
+    nested = functools.partial(functools.partial(rf_port, len_taper=100), gap2=10)
+    flat = functools.partial(rf_port, gap2=10, len_taper=100.0000001)
+    assert cache.canonical(nested) == cache.canonical(flat)
+    assert cache.canonical(0.1 + 0.2) == cache.canonical(0.3)
+    assert cache.canonical({"b": [1, 2], "a": np.array([0.5])}) == cache.canonical(
+        {"a": (0.5,), "b": (1, 2)}
+    )
+    hash(cache.canonical({"launcher": nested, "sizes": [np.float64(1.5)]}))
+
+
+def test_cell_names_are_stable():
+    """Equivalent calls hit the same cell, named alike in every process."""
+    component = cpw_with_ports(
+        launcher=functools.partial(rf_port, len_taper=100), width=12
+    )
+    assert (
+        cpw_with_ports(
+            launcher=functools.partial(rf_port, len_taper=100.0000001), width=12.0
+        )
+        is component
+    )
+    script = (
+        "import functools\n"
+        "from qutegds import cpw_with_ports, rf_port\n"
+        "launcher = functools.partial(rf_port, len_taper=100)\n"
+        "print(cpw_with_ports(launcher=launcher, width=12).name)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split()[-1] == component.name
+
+
+def test_canonical_keeps_float_parameters():
+    """Floats are told apart well below the database unit."""
+    assert cache.canonical(0.5) != cache.canonical(0.5004)
+    assert resonator_cpw(p=0.5).name != resonator_cpw(p=0.5004).name
+    keys = [
+        cache.cell_key("resonator_cpw", cache.canonical_kwargs(resonator_cpw, p=p))
+        for p in (0.5, 0.5004)
+    ]
+    assert keys[0] != keys[1]
+
+
+def test_names_pruned_after_clear_cache():
+    """Names of the cells dropped by gf.clear_cache are forgotten."""
+    name = resonator_cpw(length=3210).name
+    assert name in qutegds.cell._keys
+    gf.clear_cache()
+    resonator_cpw(length=3220)
+    assert name not in qutegds.cell._keys
+    assert set(qutegds.cell._keys) <= set(CACHE)
+
+
+@pytest.fixture
+def memory_cache():
+    gf.clear_cache()
+    yield cache.enable_memory_cache(max_entries=30)
+    cache.disable_memory_cache()
+    gf.clear_cache()
+
+
+def test_memory_cache_bounds(memory_cache):
+    """The cell cache stays bounded and never loses cells of cached parents."""
+    for length in range(3000, 3100, 5):
+        resonator_cpw(length=length)
+        assert len(CACHE) <= memory_cache.max_entries
+        for component in CACHE.values():
+            for ref in component.references:
+                assert ref.parent.name in CACHE
+    assert memory_cache.misses == 20
+    assert memory_cache.evictions > 0
+
+    component = resonator_cpw(length=3095)
+    assert resonator_cpw(length=3095) is component
+    assert memory_cache.hits == 2
+    evicted = resonator_cpw(length=3000)
+    assert memory_cache.misses == 21
+    assert evicted.name == "resonator_cpw_length3000"
+
+
+def test_memory_cache_keeps_children_of_live_cells(memory_cache):
+    """Cells referenced by a component held by the caller are never dropped."""
+    memory_cache.max_entries = 10
+    held = resonator_cpw(length=2990)
+    for length in range(3000, 3050, 5):
+        resonator_cpw(length=length)
+    assert memory_cache.evictions > 0
+    for ref in held.references:
+        assert CACHE.get(ref.parent.name) is ref.parent
+
+
+def test_memory_cache_bytes(memory_cache):
+    """The estimated size of the cached cells stays below max_bytes."""
+    memory_cache.max_entries = None
+    memory_cache.max_bytes = 2000
+    for length in range(3000, 3100, 5):
+        cpw_with_ports(length=length)
+        assert memory_cache.nbytes <= memory_cache.max_bytes
+    assert memory_cache.evictions > 0
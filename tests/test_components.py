@@ -9,14 +9,17 @@ it will test 3 things:
 
 """
 
+import json
 import pathlib
 
 import pytest
 from gdsfactory.component import Component
 from gdsfactory.difftest import difftest
+from gdsfactory.name import clean_name
 from pytest_regressions.data_regression import DataRegressionFixture
 
 from qutegds import cells
+from qutegds.geometry import geometry_hash
 
 skip_test = ["resonator_array"]
 cell_names = set(cells.keys()) - set(skip_test)
@@ -28,9 +31,26 @@ def component(request) -> Component:
     return cells[request.param]()
 
 
-def test_pdk_gds(component: Component) -> None:
-    """Avoid regressions in GDS geometry, cell names and layers."""
-    difftest(component, dirpath=dirpath_ref)
+def test_pdk_gds(component: Component, request: pytest.FixtureRequest) -> None:
+    """Avoid regressions in GDS geometry, cell names and layers.
+
+    The XOR against the reference only runs if the geometry hashes stored next
+    to it differ. The hashes are only written with ``--force-regen``.
+    """
+    test_name = (
+        f"{component.function_name}_{component.name}"
+        if component.name != component.function_name
+        else component.name
+    )
+    hashpath = dirpath_ref / f"{clean_name(test_name)}.json"
+    if hashpath.exists() and json.loads(hashpath.read_text()) == geometry_hash(
+        component
+    ):
+        return
+    difftest(component, test_name=test_name, dirpath=dirpath_ref)
+    if request.config.getoption("force_regen"):
+        gdspath = hashpath.with_suffix(".gds")
+        hashpath.write_text(json.dumps(geometry_hash(gdspath), indent=2) + "\n")
 
 
 def test_pdk_settings(
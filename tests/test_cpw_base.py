@@ -0,0 +1,44 @@
+"""Tests for the boolean-free CPW generation."""
+
+import pathlib
+
+import pytest
+from gdsfactory.difftest import diff
+
+from qutegds import cpw, resonator_cpw, rf_port, snake
+
+dirpath_ref = pathlib.Path(__file__).absolute().parent / "ref"
+
+
+@pytest.mark.parametrize(
+    "factory,ref",
+    [
+        (cpw, "cpw"),
+        (snake, "cpw_cpw_component_namedelay_snake"),
+        (rf_port, "rf_port"),
+        (resonator_cpw, "resonator_cpw"),
+    ],
+)
+def test_analytic_matches_boolean(factory, ref, tmp_path):
+    """Analytic gaps reproduce the boolean references up to grid slivers."""
+    component = factory(analytic=True)
+    run_file = component.write_gds(tmp_path / f"{ref}.gds")
+    assert not diff(
+        dirpath_ref / f"{ref}.gds",
+        run_file,
+        test_name=ref,
+        ignore_sliver_differences=True,
+        ignore_cell_name_differences=True,
+        show=False,
+    )
+
+
+@pytest.mark.parametrize("factory", [cpw, snake, rf_port])
+def test_analytic_ports(factory):
+    """Analytic and boolean modes expose the same ports."""
+    boolean = factory()
+    analytic = factory(analytic=True)
+    for name, port in boolean.ports.items():
+        assert analytic.ports[name].width == pytest.approx(port.width)
+        assert tuple(analytic.ports[name].center) == pytest.approx(tuple(port.center))
+        assert analytic.ports[name].orientation == port.orientation
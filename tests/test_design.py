@@ -0,0 +1,30 @@
+"""Tests for the resonator inverse design."""
+
+import numpy as np
+import pytest
+
+from qutegds import resonator
+from qutegds.design import quarter_wave_length, resonator_parameters
+
+
+def test_lengths_match_builds():
+    """Achieved lengths agree with the routes of real resonators."""
+    lengths = np.array([600.0, 1234.5, 2500.0])
+    n = np.array([1, 2, 3])
+    radius = np.array([10.0, 5.0, 12.5])
+    design = resonator_parameters(length=lengths, n=n, radius=radius, p=0.3)
+    assert design.feasible.all()
+    for i, length in enumerate(lengths):
+        c = resonator(length=length, n=int(n[i]), radius=radius[i], p=0.3)
+        assert c.info["length"] == pytest.approx(design.length[i], abs=1e-6)
+
+
+def test_frequency_and_feasibility():
+    """Frequencies are converted to quarter-wave lengths, short ones are rejected."""
+    frequency = np.array([5e9, 6e9, 500e9])
+    design = resonator_parameters(frequency=frequency, eps_eff=6.45, n=4)
+    expected = resonator_parameters(length=quarter_wave_length(frequency, 6.45), n=4)
+    np.testing.assert_allclose(design.L2, expected.L2)
+    assert design.feasible.tolist() == [True, True, False]
+    with pytest.raises(ValueError):
+        resonator_parameters(frequency=frequency)
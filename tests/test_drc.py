@@ -0,0 +1,30 @@
+"""Tests for the width and space checks."""
+
+import pytest
+
+from qutegds import cpw, stripes_array
+from qutegds.drc import Rule, drc
+
+
+def test_cpw_rules():
+    """Default CPW is clean, a narrow one violates both rules."""
+    assert drc(cpw()).clean
+    result = drc(cpw(width=1.5, gap=1, length=100))
+    assert result.counts == {"min_gap": 2, "min_width": 1}
+    for marker in result.markers["min_gap"]:
+        assert marker[:, 0].min() >= 0 and marker[:, 0].max() <= 100
+
+
+def test_tiles_do_not_change_markers():
+    """Violations crossing tiles are counted once."""
+    c = stripes_array(widths=[1, 3, 1.5], spacing=100)
+    rules = [Rule("narrow", "WG", "width", 2), Rule("close", "WG", "space", 150)]
+    single = drc(c, rules=rules, tile_size=1e5)
+    tiled = drc(c, rules=rules, tile_size=300, threads=2)
+    assert single.counts == tiled.counts == {"narrow": 2, "close": 4}
+
+
+def test_unknown_kind():
+    """Only width and space checks are supported."""
+    with pytest.raises(ValueError):
+        drc(cpw(), rules=[Rule("enclosure", "WG", "enclosing", 1)])
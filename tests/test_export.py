@@ -0,0 +1,98 @@
+"""Tests for the streaming and incremental exports."""
+
+import gdsfactory as gf
+import klayout.db as kdb
+import pytest
+
+from qutegds import (
+    chip_title,
+    resonator_array,
+    resonator_cpw,
+    squares_at_corner_chip,
+)
+from qutegds.export import (
+    MANIFEST_SUFFIX,
+    StreamWriter,
+    write_incremental,
+    write_stream,
+)
+
+
+def dies():
+    """Yield dies with distinct titles and a shared corner square."""
+    for i in range(4):
+        title = chip_title(title=f"D{i}", length=2e3)
+        yield squares_at_corner_chip(size=(3e3, 3e3), center_comp=title), (0, 3e3 * i)
+
+
+@pytest.mark.parametrize("suffix", ["gds", "gds.gz", "oas"])
+def test_stream_matches_component(tmp_path, suffix, xor_is_empty):
+    """Streamed file has the geometry of the same layout built in memory."""
+    c = gf.Component("in_memory")
+    for die, origin in dies():
+        (c << die).move(origin)
+    path = write_stream(dies(), tmp_path / f"stream.{suffix}")
+    gdspath = tmp_path / "stream_converted.gds"
+    layout = kdb.Layout()
+    layout.read(str(path))
+    layout.write(str(gdspath))
+    assert layout.top_cell().name == "TOP"
+    assert xor_is_empty(c.write_gds(tmp_path / "in_memory.gds"), gdspath)
+
+
+@pytest.mark.parametrize("free", [True, False])
+def test_cells_written_once(tmp_path, free):
+    """Cells shared by several dies are written once, even when freed."""
+    gf.clear_cache()
+    with StreamWriter(tmp_path / "stream.gds", free=free) as writer:
+        for die, origin in dies():
+            writer.place(die, origin)
+        # a freed die is rebuilt under its name, and not written again
+        writer.place(resonator_cpw(length=500), (5e3, 0))
+        writer.place(resonator_cpw(length=500), (5e3, 3e3))
+        writer.place(resonator_cpw(length=600), (5e3, 6e3))
+    layout = kdb.Layout()
+    layout.read(str(tmp_path / "stream.gds"))
+    names = [cell.name for cell in layout.each_cell()]
+    assert len(names) == len(set(names)) == len(writer.written) + 1
+    assert not [name for name in names if "$" in name]
+
+
+def test_unknown_format(tmp_path):
+    """Only GDS, gzipped GDS and OASIS are supported."""
+    with pytest.raises(ValueError):
+        StreamWriter(tmp_path / "stream.dxf")
+
+
+def test_write_incremental(tmp_path, xor_is_empty):
+    """Only changed cells and their ancestors are serialized again."""
+    attrs = {"length": [4000, 4200, 4400]}
+    path = tmp_path / "chip.gds"
+    first = write_incremental(resonator_array(resonators_attrs=attrs), path)
+    assert not first["reused"]
+    assert not write_incremental(resonator_array(resonators_attrs=attrs), path)[
+        "written"
+    ]
+
+    attrs["length"][1] = 4250
+    chip = resonator_array(resonators_attrs=attrs)
+    result = write_incremental(chip, path)
+    assert "resonator_cpw_length4250" in result["written"]
+    assert chip.name in result["written"]
+    assert "rf_port" in result["reused"]
+    assert len(result["written"]) < len(result["reused"])
+
+    full = tmp_path / "full.gds"
+    write_incremental(chip, full)
+    assert path.read_bytes() == full.read_bytes()
+    assert xor_is_empty(path, chip.write_gds(tmp_path / "gf.gds"))
+
+
+def test_write_incremental_modified_file(tmp_path):
+    """A library changed behind the manifest is written again from scratch."""
+    chip = resonator_array(resonators_attrs={"length": [4000, 4200]})
+    path = tmp_path / "chip.gds"
+    write_incremental(chip, path)
+    assert (tmp_path / f"chip.gds{MANIFEST_SUFFIX}").exists()
+    path.write_bytes(path.read_bytes()[:-4])
+    assert not write_incremental(chip, path)["reused"]
@@ -0,0 +1,60 @@
+"""Tests for the fractured export."""
+
+import klayout.db as kdb
+import pytest
+
+from qutegds import cpw_with_ports, resonator_cpw
+from qutegds.fracture import fracture
+
+
+def _regions(gdspath):
+    layout = kdb.Layout()
+    layout.read(str(gdspath))
+    top = layout.top_cell()
+    return {
+        (info.layer, info.datatype): kdb.Region(top.begin_shapes_rec(index))
+        for index, info in zip(layout.layer_indexes(), layout.layer_infos())
+    }, layout
+
+
+@pytest.mark.parametrize("mode", ["trapezoids", "vertices"])
+def test_fracture(tmp_path, mode):
+    """Figures do not overlap, cover the merged layers and have few vertices."""
+    component = resonator_cpw()
+    result = fracture(
+        component, tmp_path / "fractured.oas", mode=mode, max_vertices=6, tile_size=300
+    )
+    expected, _ = _regions(component.write_gds(tmp_path / "component.gds"))
+    fractured, layout = _regions(result.path)
+    assert len(layout.top_cells()) == 1
+    assert set(fractured) == set(expected)
+    for layer, region in fractured.items():
+        key = f"{layer[0]}/{layer[1]}"
+        assert region.count() == result.figures[key] > 0
+        # slanted edges of the figures are rounded to the database unit
+        assert (region ^ expected[layer]).sized(-1).is_empty()
+        assert region.area() == pytest.approx(region.merged().area(), rel=1e-5)
+        for polygon in region.each():
+            assert not polygon.holes()
+            assert polygon.num_points() <= (4 if mode == "trapezoids" else 6)
+            if mode == "trapezoids":
+                assert {edge.dy() for edge in polygon.each_edge()} != {0}
+                assert polygon.is_box() or any(
+                    edge.dy() == 0 for edge in polygon.each_edge()
+                )
+    assert result.total == sum(result.figures.values())
+
+
+def test_fracture_layers(tmp_path):
+    """Only the given layers are written."""
+    result = fracture(cpw_with_ports(), tmp_path / "wg.gds.gz", layers=["WG"])
+    assert list(result.figures) == ["1/0"]
+    assert result.path.stat().st_size > 0
+
+
+def test_fracture_invalid(tmp_path):
+    """Invalid modes and vertex counts are rejected."""
+    with pytest.raises(ValueError, match="mode"):
+        fracture(cpw_with_ports(), tmp_path / "x.gds", mode="triangles")
+    with pytest.raises(ValueError, match="max_vertices"):
+        fracture(cpw_with_ports(), tmp_path / "x.gds", mode="vertices", max_vertices=3)
@@ -0,0 +1,110 @@
+"""Tests for the geometry functions."""
+
+import gdsfactory as gf
+import klayout.db as kdb
+import numpy as np
+
+from qutegds import centered_chip, chip_title, resonator_array, stripes_array
+from qutegds.geometry import (
+    INNER_LAYER,
+    OUTER_LAYER,
+    defer_booleans,
+    geometry_hash,
+    resolve_booleans,
+    scanline_spans,
+    subtract,
+)
+
+
+def test_tiled_negative_matches_boolean(tmp_path, xor_is_empty):
+    """Tiled negative mask matches the single boolean one, merged across tiles."""
+    center = stripes_array(widths=[1, 2, 5, 10])
+    kwargs = {"center_comp": center, "size": (8e3, 1.2e4), "negative": True}
+    single = centered_chip(**kwargs)
+    tiled = centered_chip(tile_size=1500, threads=3, **kwargs)
+    assert len(tiled.get_polygons()) == len(single.get_polygons())
+    assert xor_is_empty(
+        single.write_gds(tmp_path / "single.gds"),
+        tiled.write_gds(tmp_path / "tiled.gds"),
+    )
+
+
+def test_geometry_hash_is_canonical():
+    """Hashes ignore polygon order, first vertices and hierarchy, not geometry."""
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    triangle = [(20, 0), (30, 0), (20, 5)]
+    a = gf.Component("hash_a")
+    a.add_polygon(square, layer=(1, 0))
+    a.add_polygon(triangle, layer=(2, 0))
+    b = gf.Component("hash_b")
+    b.add_polygon(triangle[1:] + triangle[:1], layer=(2, 0))
+    half = gf.Component("hash_half")
+    half.add_polygon([(0, 0), (5, 0), (5, 10), (0, 10)], layer=(1, 0))
+    b << half
+    (b << half).movex(5)
+    assert geometry_hash(a) == geometry_hash(b)
+    assert set(geometry_hash(a)) == {"1/0", "2/0"}
+    b.add_polygon([(0, 0), (0.001, 0), (0, 0.001)], layer=(2, 0))
+    assert geometry_hash(a) != geometry_hash(b)
+
+
+def test_deferred_booleans_match_eager(tmp_path):
+    """Booleans resolved once per chip match the per-component ones."""
+    attrs = {"length": [3000.0, 4000.0, 3500.0], "n": [1, 2, 1]}
+    chip_kwargs = {"size": (8e3, 8e3), "negative": True}
+    eager = [
+        resonator_array(attrs, labels_y_offset=2000),
+        centered_chip(center_comp=chip_title, **chip_kwargs),
+    ]
+    with defer_booleans():
+        deferred = resonator_array(attrs, labels_y_offset=2000)
+        assert OUTER_LAYER in deferred.get_layers()
+        deferred = [
+            resolve_booleans(deferred),
+            centered_chip(center_comp=chip_title, **chip_kwargs),
+        ]
+    for n, (a, b) in enumerate(zip(eager, deferred)):
+        assert a.name != b.name
+        assert {OUTER_LAYER, INNER_LAYER}.isdisjoint(b.get_layers())
+        layouts = [kdb.Layout(), kdb.Layout()]
+        for layout, c in zip(layouts, (a, b)):
+            layout.read(str(c.write_gds(tmp_path / f"{c.name}_{n}.gds")))
+        for layer in a.get_layers():
+            regions = [
+                kdb.Region(layout.top_cell().begin_shapes_rec(layout.layer(*layer)))
+                for layout in layouts
+            ]
+            # eager booleans are fractured by gdstk, leaving sub-nm slivers
+            assert (regions[0] ^ regions[1]).sized(-1).is_empty()
+
+
+def test_deferred_booleans_subtract_unions():
+    """Resolved differences are the union of A minus the union of B."""
+
+    def rectangle(name, x0, x1, y0=0.0, y1=10.0):
+        c = gf.Component(name)
+        c.add_polygon([(x0, y0), (x1, y0), (x1, y1), (x0, y1)], layer=(1, 0))
+        return c
+
+    with defer_booleans():
+        c = gf.Component("overlapping_rings")
+        c << subtract(rectangle("a1", 0, 10), rectangle("b1", 2, 8, 2, 8))
+        c << subtract(rectangle("a2", 6, 16), rectangle("b2", 8, 14, 2, 8))
+        resolved = resolve_booleans(c)
+    # the hole of the second ring also cuts the wall of the first one
+    assert resolved.area() == 16 * 10 - 12 * 6
+
+
+def test_scanline_spans():
+    """Spans follow the even-odd rule, holes included."""
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    hole = [(4, 2), (6, 2), (6, 8), (4, 8)]
+    edges = [
+        (*polygon[i - 1], *polygon[i])
+        for polygon in (square, hole)
+        for i in range(len(polygon))
+    ]
+    row, x0, x1 = scanline_spans(np.array(edges), np.array([-1, 0, 1, 5, 9, 10]))
+    assert row.tolist() == [1, 2, 3, 3, 4]
+    assert x0.tolist() == [0, 0, 0, 6, 0]
+    assert x1.tolist() == [10, 10, 4, 10, 10]
@@ -0,0 +1,39 @@
+"""Tests for the ground plane holes."""
+
+import klayout.db as kdb
+
+from qutegds import centered_chip, flux_holes
+from qutegds.geometry import geometry_hash
+
+
+def test_holes_keep_out(tmp_path):
+    """Holes keep away from gaps, traces and chip boundary."""
+    chip = centered_chip(center_comp="cpw_with_ports", size=(3e3, 2e3))
+    c = flux_holes(chip=chip, pitch=20, hole_size=2, keep_out=10)
+    assert 10 * len(c.references) < c.info["holes"]
+
+    layouts = [kdb.Layout(), kdb.Layout()]
+    regions = []
+    for layout, component in zip(layouts, (chip, c)):
+        layout.read(str(component.write_gds(tmp_path / f"{component.name}.gds")))
+        regions.append(
+            kdb.Region(layout.top_cell().begin_shapes_rec(layout.layer(1, 0)))
+        )
+    gaps, holes = regions[0], regions[1] - regions[0]
+    assert holes.count() == c.info["holes"]
+    assert gaps.separation_check(holes, 10000).is_empty()
+    trace = gaps.sized(175000).sized(-175000) - gaps
+    assert not trace.is_empty()
+    assert (holes & trace).is_empty()
+    (xmin, ymin), (xmax, ymax) = chip.bbox
+    boundary = kdb.Region(kdb.DBox(xmin, ymin, xmax, ymax).to_itype(0.001))
+    assert holes.inside(boundary.sized(-10000)).count() == holes.count()
+
+
+def test_arrays_match_polygons():
+    """Array references and polygons give the same holes."""
+    chip = centered_chip(center_comp="cpw_with_ports", size=(3e3, 2e3))
+    kwargs = {"chip": chip, "pitch": 50, "hole_size": 5}
+    assert geometry_hash(flux_holes(**kwargs)) == geometry_hash(
+        flux_holes(arrays=False, **kwargs)
+    )
@@ -0,0 +1,61 @@
+"""Check that ``import qutegds`` stays cheap."""
+
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_BUDGET = 0.5
+"""Maximum wall time in seconds allowed for ``import qutegds``."""
+
+_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import qutegds
+print(time.perf_counter() - start)
+print("gdsfactory" in sys.modules)
+"""
+
+
+def _import_qutegds() -> tuple[float, bool]:
+    out = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def test_import_is_lazy():
+    """Importing the package must not import gdsfactory."""
+    _, gdsfactory_loaded = _import_qutegds()
+    assert not gdsfactory_loaded
+
+
+def test_import_time_budget():
+    """Fail if ``import qutegds`` exceeds IMPORT_BUDGET (best of three runs)."""
+    elapsed = min(_import_qutegds()[0] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, f"import qutegds took {elapsed:.3f}s"
+
+
+def test_components_import_without_pdk():
+    """Component modules only activate the PDK on the first build."""
+    script = (
+        "import sys\n"
+        "from qutegds.components.resonator import resonator_cpw\n"
+        "print('qutegds.pdk' in sys.modules)\n"
+        "resonator_cpw()\n"
+        "print('qutegds.pdk' in sys.modules)\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout.split()
+    # gdsfactory logs the PDK activation in between
+    assert (out[0], out[-1]) == ("False", "True")
+
+
+@pytest.mark.parametrize("name", ["cpw", "resonator_cpw", "stripes_array"])
+def test_lazy_factories(name):
+    """Lazy attributes resolve to the registered cells."""
+    import qutegds
+
+    assert getattr(qutegds, name) is qutegds.cells[name]
+    assert qutegds.get_qute_pdk() is qutegds.qute_pdk
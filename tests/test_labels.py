@@ -0,0 +1,32 @@
+"""Tests for the glyph based labels."""
+
+import gdsfactory as gf
+import pytest
+
+from qutegds import chip_title, glyph, label
+
+
+@pytest.mark.parametrize("justify", ["left", "right", "center"])
+def test_label_matches_text(tmp_path, justify, xor_is_empty):
+    """Labels have the same geometry as gdsfactory text."""
+    kwargs = {"text": "R12 ab\nQ-3", "size": 25, "position": (3, 7), "justify": justify}
+    assert xor_is_empty(
+        gf.components.text(**kwargs).write_gds(tmp_path / "text.gds"),
+        label(**kwargs).write_gds(tmp_path / "label.gds"),
+    )
+
+
+def test_glyphs_are_shared():
+    """Repeated characters reference the same glyph cell."""
+    c = label("R1 R2 R11")
+    assert {ref.parent.name for ref in c.references} == {
+        glyph(ch, size=10.0).name for ch in "R12"
+    }
+
+
+def test_chip_title_glyphs_matches_boolean(tmp_path, xor_is_empty):
+    """Title drawn from glyphs matches the boolean one."""
+    assert xor_is_empty(
+        chip_title("Chip 12-B q").write_gds(tmp_path / "boolean.gds"),
+        chip_title("Chip 12-B q", glyphs=True).write_gds(tmp_path / "glyphs.gds"),
+    )
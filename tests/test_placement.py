@@ -0,0 +1,23 @@
+"""Tests for the placement checks."""
+
+import numpy as np
+
+from qutegds.placement import BoxIndex
+
+
+def test_box_index_matches_brute_force():
+    """Queries return the same boxes as comparing every pair."""
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, 1000, (200, 2))
+    bboxes = np.stack([corners, corners + rng.uniform(1, 50, (200, 2))], axis=1)
+    index = BoxIndex(cell_size=30)
+    for n, bbox in enumerate(bboxes):
+        index.insert(n, bbox)
+    for bbox in bboxes[:20]:
+        grown = bbox + [[-10], [10]]
+        expected = {
+            n
+            for n, other in enumerate(bboxes)
+            if (grown[0] < other[1]).all() and (other[0] < grown[1]).all()
+        }
+        assert index.query(bbox, clearance=10) == expected
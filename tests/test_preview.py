@@ -0,0 +1,58 @@
+"""Tests for the raster previews."""
+
+import struct
+
+import gdsfactory as gf
+import numpy as np
+
+from qutegds import centered_chip
+from qutegds.preview import rasterize, to_png
+
+
+def _l_shape() -> gf.Component:
+    c = gf.Component()
+    c.add_polygon([(0, 0), (6, 0), (6, 2), (2, 2), (2, 5), (0, 5)], layer=(1, 0))
+    return c
+
+
+def test_rasterize_rectangle():
+    """Pixels are set when their center is inside a polygon."""
+    c = gf.Component()
+    c.add_polygon([(0.2, 0.2), (10.2, 0.2), (10.2, 5.2), (0.2, 5.2)], layer=(1, 0))
+    mask = rasterize(c, pixel_size=1)[(1, 0)]
+    assert mask.shape == (6, 11)
+    assert mask.sum() == 50
+    assert not mask[0].any() and not mask[:, -1].any()
+
+
+def test_rasterize_references_match_flat():
+    """Rotated, reflected and arrayed references are drawn as flat polygons."""
+    shape = _l_shape()
+    c = gf.Component()
+    # offsets are multiples of 1 / 16 pixel keeping edges off the pixel centers
+    for n, rotation in enumerate((0, 90, 180, 270)):
+        for mirror in (False, True):
+            ref = c << shape
+            if mirror:
+                ref.mirror((0, 0), (1, 0))
+            ref.rotate(rotation)
+            ref.move((20 * n + 0.25, 20 * mirror + 0.375))
+    array = c.add_array(shape, columns=5, rows=3, spacing=(7.0625, 6.25))
+    array.move((0.125, 50))
+    hierarchical = rasterize(c, pixel_size=1)
+    flat = rasterize(c.flatten(), pixel_size=1)
+    assert np.array_equal(hierarchical[(1, 0)], flat[(1, 0)])
+
+
+def test_to_png_cache(tmp_path):
+    """PNG files have the requested size and are reused by content hash."""
+    c = centered_chip()
+    data = to_png(c, tmp_path / "chip.png", max_pixels=64, cache_dir=tmp_path / "cache")
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    assert max(width, height) in (64, 65)
+    assert (tmp_path / "chip.png").read_bytes() == data
+    (cached,) = (tmp_path / "cache").iterdir()
+    cached.write_bytes(b"cached")
+    assert to_png(c, max_pixels=64, cache_dir=tmp_path / "cache") == b"cached"
+    assert to_png(c, max_pixels=32, cache_dir=tmp_path / "cache") != b"cached"
@@ -0,0 +1,110 @@
+"""Tests for the resonator components."""
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+from gdsfactory.difftest import diff
+
+from qutegds import (
+    resonator,
+    resonator_array,
+    resonator_cpw,
+    termination_closed,
+    termination_open,
+)
+from qutegds.geometry import count_vertices, vertex_savings
+
+RESONATORS_ATTRS = {"length": [800.0, 850.0, 900.0, 800.0], "n": [1, 1, 2, 1]}
+
+
+def test_resonator_array_parallel(tmp_path):
+    """Parallel and serial builds give the same layout."""
+    gf.clear_cache()
+    serial = resonator_array(RESONATORS_ATTRS, labels_y_offset=100)
+    serial_file = serial.write_gds(tmp_path / "serial.gds")
+    gf.clear_cache()
+    parallel = resonator_array(RESONATORS_ATTRS, labels_y_offset=100, max_workers=2)
+    parallel_file = parallel.write_gds(tmp_path / "parallel.gds")
+    gf.clear_cache()
+
+    assert sorted(ref.parent.name for ref in serial.references) == sorted(
+        ref.parent.name for ref in parallel.references
+    )
+    assert not diff(
+        serial_file, parallel_file, ignore_cell_name_differences=True, show=False
+    )
+
+
+def test_resonator_after_parallel_build():
+    """Cells loaded from the workers can be reused by later serial builds."""
+    gf.clear_cache()
+    resonator_array({"length": [500, 600]}, max_workers=2)
+    built = resonator_cpw(length=777)
+    gf.clear_cache()
+    assert set(built.ports) == {"o1", "o2"}
+    assert built.info["width"] == 6.0
+
+
+def test_resonator_array_clearance():
+    """Close resonators are reported, auto spacing avoids them."""
+    attrs = {"length": [3000.0, 4000.0, 5000.0, 3500.0, 3000.0], "n": [1, 2, 3, 2, 1]}
+    kwargs = {"labels_y_offset": 2000, "clearance": 5}
+    c = resonator_array(attrs, spacing=50, **kwargs)
+    assert c.info["collisions"] == ["R0 / R2", "R1 / R3"]
+    with pytest.raises(ValueError):
+        resonator_array(attrs, spacing=50, strict=True, **kwargs)
+    c = resonator_array(attrs, auto_spacing=True, **kwargs)
+    assert 50 < c.info["spacing"] < 1000
+    assert c.info["collisions"] == []
+
+
+@pytest.mark.parametrize("termination", [termination_open, termination_closed])
+@pytest.mark.parametrize("max_chord_error", [1.0, 10.0])
+def test_termination_chord_error(termination, max_chord_error):
+    """Adaptive terminations use fewer vertices within the chord error."""
+    fixed = termination()
+    adaptive = termination(max_chord_error=max_chord_error)
+    saved = count_vertices(fixed) - count_vertices(adaptive)
+    assert saved > 0
+    assert vertex_savings(adaptive) == {adaptive.name: saved}
+    # chords deviate from the arcs by at most the error along their length
+    perimeter = sum(
+        np.linalg.norm(np.diff(p, axis=0), axis=1).sum() for p in fixed.get_polygons()
+    )
+    assert abs(fixed.area() - adaptive.area()) <= perimeter * max_chord_error * 1e-3
+
+
+@pytest.mark.parametrize("termination", [termination_open, termination_closed])
+def test_termination_coarse_resolution(termination):
+    """Savings are negative when the angle resolution is already coarser."""
+    fixed = termination(angle_resolution=45)
+    adaptive = termination(angle_resolution=45, max_chord_error=0.1)
+    saved = count_vertices(fixed) - count_vertices(adaptive)
+    assert saved < 0
+    assert adaptive.info["vertices_saved"] == saved
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"n": 3, "length": 1500.0}, {"n": 2, "length": 900.5, "p": 0.2, "radius": 7}],
+)
+def test_resonator_extrude(tmp_path, kwargs, xor_is_empty):
+    """Extruded meander is a single polygon with the routed length and shape."""
+    routed = resonator(**kwargs)
+    extruded = resonator(extrude=True, **kwargs)
+    assert not extruded.references
+    assert len(extruded.get_polygons()) == 1
+    assert extruded.info["length"] == routed.info["length"]
+    assert extruded.ports["o2"].center.tolist() == routed.ports["o2"].center.tolist()
+    assert xor_is_empty(
+        resonator_cpw(**kwargs).write_gds(tmp_path / "routed.gds"),
+        resonator_cpw(extrude=True, **kwargs).write_gds(tmp_path / "extruded.gds"),
+    )
+
+
+def test_resonator_extrude_rejects_routing_options():
+    """Options of the routed meander are not silently ignored when extruding."""
+    with pytest.raises(ValueError):
+        resonator(extrude=True, bend="bend_circular")
+    with pytest.raises(ValueError):
+        resonator(extrude=True, with_sbend=False)
@@ -0,0 +1,80 @@
+"""Tests for the build server."""
+
+import asyncio
+import base64
+import json
+
+import gdstk
+
+from qutegds.server import BuildServer
+
+
+async def _request(path, method, target, payload=None):
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+async def _session(path):
+    server = BuildServer(max_workers=1)
+    try:
+        async with await server.start(unix=path):
+            request = {"cell": "resonator_cpw", "settings": {"length": 4321}}
+            responses = await asyncio.gather(
+                *(_request(path, "POST", "/build", request) for _ in range(3))
+            )
+            counts = server.builds, server.merged
+            # settings default to those of the cell
+            default = await _request(path, "POST", "/build", {"cell": "cpw"})
+            bogus = {"cell": "cpw", "settings": {"bogus": 1}}
+            errors = [
+                await _request(path, "POST", "/build", {"cell": "nope"}),
+                await _request(path, "POST", "/build", bogus),
+                await _request(path, "POST", "/build", {"settings": {}}),
+                await _request(path, "GET", "/nope"),
+            ]
+            cells = await _request(path, "GET", "/cells")
+            return counts, responses, default, errors, cells
+    finally:
+        server.close()
+
+
+def test_server(tmp_path):
+    """Concurrent identical requests share one build in a worker."""
+    counts, responses, default, errors, cells = asyncio.run(
+        _session(tmp_path / "s.sock")
+    )
+    assert counts == (1, 2)
+    (status, result), *others = responses
+    assert status == 200 and all(other == (status, result) for other in others)
+    assert result["name"] == "resonator_cpw_length4321"
+    assert result["settings"]["length"] == 4321
+    assert set(result["ports"]) == {"o1", "o2"}
+    gdspath = tmp_path / "r.gds"
+    gdspath.write_bytes(base64.b64decode(result["gds"]))
+    assert gdstk.read_rawcells(str(gdspath))["resonator_cpw_length4321"]
+    assert default[0] == 200 and default[1]["name"] == "cpw"
+    assert [status for status, _ in errors] == [400, 400, 400, 404]
+    assert "resonator_cpw" in cells[1]["cells"]
+
+
+async def _start(path, max_workers):
+    server = BuildServer(max_workers=max_workers)
+    try:
+        async with await server.start(unix=path):
+            return len(server.pool._processes)
+    finally:
+        server.close()
+
+
+def test_server_starts_every_worker(tmp_path):
+    """Every worker process is started before the server listens."""
+    assert asyncio.run(_start(tmp_path / "s.sock", 3)) == 3
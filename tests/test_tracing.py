@@ -0,0 +1,51 @@
+"""Tests for build tracing."""
+
+import json
+
+import gdsfactory as gf
+
+from qutegds import cache, chip_title, resonator_cpw, tracing
+
+
+def test_trace_nested_builds(tmp_path):
+    """Nested cells and booleans are recorded, with cache hits on rebuilds."""
+    gf.clear_cache()
+    with tracing.trace() as tracer:
+        resonator_cpw(length=600)
+        resonator_cpw(length=600)
+        chip_title()
+    assert tracing.get_tracer() is None
+
+    summary = tracer.summary()
+    assert summary["resonator_cpw"]["calls"] == 2
+    assert summary["resonator_cpw"]["hits"] == 1
+    assert summary["subtract"]["calls"] == 2
+    assert summary["cpw"]["total_s"] >= summary["cpw"]["self_s"]
+    assert "resonator_cpw" in tracer.table()
+
+    boolean = next(e for e in tracer.events if e["name"] == "subtract")
+    assert boolean["args"]["vertices_a"] > 0 and boolean["args"]["vertices_b"] > 0
+    depths = {}
+    for event in sorted(tracer.events, key=lambda e: e["start"]):
+        depths.setdefault(event["name"], event["depth"])
+    assert depths["resonator_cpw"] < depths["cpw"] < depths["subtract"]
+
+    path = tracer.write_chrome_trace(tmp_path / "trace.json")
+    events = json.loads(path.read_text())["traceEvents"]
+    assert len(events) == len(tracer.events)
+    assert all(event["ph"] == "X" for event in events)
+
+
+def test_trace_disk_hits(tmp_path):
+    """Cells loaded from the disk cache are recorded as hits."""
+    gf.clear_cache()
+    cache.enable_disk_cache(tmp_path)
+    try:
+        resonator_cpw(length=650)
+        gf.clear_cache()
+        with tracing.trace() as tracer:
+            resonator_cpw(length=650)
+    finally:
+        cache.disable_disk_cache()
+        gf.clear_cache()
+    assert tracer.summary()["resonator_cpw"]["hits"] == 1
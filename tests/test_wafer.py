@@ -0,0 +1,55 @@
+"""Tests for the wafer layouts."""
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+
+from qutegds import chip_title, squares_at_corner_chip, wafer
+from qutegds.components.wafer import array_rectangles
+
+
+def test_array_rectangles_cover_mask():
+    """Rectangles cover every True site exactly once."""
+    mask = np.random.default_rng(0).random((12, 9)) > 0.2
+    coverage = np.zeros(mask.shape, dtype=int)
+    for column, row, columns, rows in array_rectangles(mask):
+        coverage[row : row + rows, column : column + columns] += 1
+    assert (coverage == mask).all()
+    assert array_rectangles(np.ones((5, 7), dtype=bool)) == [(0, 0, 7, 5)]
+
+
+@pytest.mark.parametrize("replace", [False, True])
+def test_wafer_matches_instances(tmp_path, xor_is_empty, replace):
+    """Arrays and overrides match one reference per die."""
+    title = {"component": "chip_title", "settings": {"length": 2e3}}
+    die = squares_at_corner_chip(size=(3e3, 3e3), center_comp=title)
+    title["settings"]["title"] = "B2"
+    c = wafer(die=die, columns=4, rows=3, overrides=[(1, 2, title)], replace=replace)
+    assert c.info["dies"] == 12
+    assert len(c.references) == c.info["arrays"] + 1 == (4 if replace else 2)
+
+    instances = gf.Component(f"instances_{replace}")
+    for row in range(3):
+        for column in range(4):
+            x, y = column * 3e3 - 6e3, row * 3e3 - 4.5e3
+            if (column, row) != (1, 2) or not replace:
+                ref = instances << die
+                ref.move((x - ref.xmin, y - ref.ymin))
+            if (column, row) == (1, 2):
+                ref = instances << chip_title(title="B2", length=2e3)
+                ref.center = (x + 1.5e3, y + 1.5e3)
+    assert xor_is_empty(
+        c.write_gds(tmp_path / "wafer.gds"),
+        instances.write_gds(tmp_path / "instances.gds"),
+    )
+
+
+def test_wafer_diameter():
+    """Only dies fully inside the wafer are kept."""
+    c = wafer(die=chip_title, columns=2, rows=8, pitch=(12e3, 600), diameter=25e3)
+    assert c.info["dies"] == 2 * 8
+    c = wafer(die=chip_title, columns=3, rows=8, pitch=(12e3, 600), diameter=25e3)
+    assert c.info["dies"] == 8
+    c = wafer(die=chip_title, columns=1, rows=100, pitch=(12e3, 600), diameter=25e3)
+    assert c.info["dies"] < 100
+    assert np.hypot(c.bbox[:, 0], c.bbox[:, 1]).max() <= 12.5e3